@@ -1,20 +1,36 @@
 from pathlib import Path
+import asyncio
 import logging
-from typing import List
+from typing import List, Optional
 from src.config.config import Config
-from src.utils.retry import retry_on_error
+from src.utils.retry import configure_retries, retry_on_error
 from src.transform import find_drug_mentions
 from src.utils.file import save_to_json, process_file
-from src.utils.constants import SCHEMA
+from src.utils.gold import MentionTimeIndex, save_ndjson_with_index
+from src.utils.constants import (
+    SCHEMA,
+    DATA_TABLE_NAMES,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    PUBLICATION_TABLE_NAMES,
+)
 from src.utils.utils import process_publication
+from src.manifest import Manifest
+from src.dictionary import load_or_build_dictionary
+from src.discovery import discover_inputs, iter_input_paths
+from src.async_pipeline import DEFAULT_QUEUE_SIZE, ingest_async, overlap_stages
+from src.utils.metrics import metrics_from_config
+from src.utils.log import setup_queue_logging
+from src.analysis.mention_stats import MentionStats
+from src.analysis.journal_stats import save_analysis_results
 
 
 def setup_logging(config: Config) -> None:
     """Setup logging configuration"""
     logging_config = config.get("logging")
-    logging.basicConfig(
+    setup_queue_logging(
         level=logging_config.get("level", "INFO"),
-        format=logging_config.get("format"),
+        log_format=logging_config.get("format"),
         filename=logging_config.get("file"),
     )
 
@@ -28,14 +44,50 @@ def validate_input_files(file_paths: List[Path]) -> bool:
     return True
 
 
-@retry_on_error(max_retries=3)
-def process_drugs(drug_file_path: Path) -> dict:
+@retry_on_error()
+def process_drugs(
+    drug_file_path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    manifest: Optional[Manifest] = None,
+    dictionary_path: Optional[Path] = None,
+    synonym_paths: Optional[List[Path]] = None,
+) -> dict:
     """Process drug data with retry mechanism"""
-    drugs_data = process_file(drug_file_path)
-    return {
-        "rows": drugs_data["valid_rows"],
+    synonym_paths = synonym_paths or []
+
+    def read_rows(file_path):
+        if manifest is not None:
+            return manifest.process_file(file_path, batch_size)["valid_rows"]
+        return process_file(file_path, batch_size)["valid_rows"]
+
+    def read_synonyms():
+        return [row for file_path in synonym_paths for row in read_rows(file_path)]
+
+    if dictionary_path is not None:
+        # Compiled drugs, parsed and compiled again only when the drugs or synonyms changed
+        return load_or_build_dictionary(
+            lambda: read_rows(drug_file_path),
+            [drug_file_path, *synonym_paths],
+            dictionary_path,
+            read_synonyms,
+        ).to_drugs()
+    drugs = {
+        "rows": read_rows(drug_file_path),
         "search_column": SCHEMA["search_column"]["drugs"],
     }
+    if synonym_paths:
+        drugs["synonyms"] = read_synonyms()
+    return drugs
+
+
+def record_matcher_gauges(metrics, stats: MentionStats, drug_count: int) -> None:
+    """Record the number of input drugs, of mentions, and the share of drugs mentioned"""
+    mention_counts = [drug["mention_count"] for drug in stats.drug_stats.values()]
+    metrics.set_gauge("matcher_drugs", drug_count)
+    metrics.set_gauge("matcher_mentions", sum(mention_counts))
+    if drug_count:
+        # Only the drugs found in at least one publication have mentions
+        metrics.set_gauge("matcher_hit_rate", stats.observed / drug_count)
 
 
 def main():
@@ -44,32 +96,139 @@ def main():
 
     logging.info("Starting data processing pipeline")
 
-    # Define file paths
-    file_paths = [
-        Path(config.get("paths")["bronze"]) / "drugs.csv",
-        Path(config.get("paths")["bronze"]) / "pubmed.csv",
-        Path(config.get("paths")["bronze"]) / "pubmed.json",
-        Path(config.get("paths")["bronze"]) / "clinical_trials.csv",
-    ]
+    # Discover the input files of each table, largest first
+    inputs = discover_inputs(Path(config.get("paths")["bronze"]), config.get("inputs"))
 
     # Validate input files
-    if not validate_input_files(file_paths):
+    if not validate_input_files([item.path for item in inputs]):
         logging.error("Input file validation failed")
         return
+    found_tables = {item.table_name for item in inputs}
+    missing_tables = [table for table in DATA_TABLE_NAMES if table not in found_tables]
+    if missing_tables:
+        logging.error(f"No input files found for tables: {', '.join(missing_tables)}")
+        return
 
-    try:
-        # Process publications
-        publications = process_publication(file_paths)
+    drug_files = list(iter_input_paths(inputs, ["drugs"]))
+    if len(drug_files) > 1:
+        logging.warning(f"Found {len(drug_files)} drugs files, using {drug_files[0]}")
 
-        # Process drugs with retry mechanism
-        drugs = process_drugs(file_paths[0])
+    processing_config = config.get("processing", {})
+    configure_retries(processing_config)
+    batch_size = processing_config.get("batch_size", DEFAULT_BATCH_SIZE)
 
-        # Find drug mentions
-        all_mentions = find_drug_mentions(drugs, publications)
+    # Manifest of previously processed inputs, used to skip unchanged files
+    silver_dir = Path(config.get("paths")["silver"])
+    manifest = Manifest(silver_dir / "manifest.json")
+
+    # Per-stage metrics of the run, exported when it ends
+    metrics, export_metrics = metrics_from_config("pipeline", config)
+    metrics.count(
+        "discover",
+        files=len(inputs),
+        input_bytes=sum(item.size for item in inputs),
+    )
+
+    try:
+        # Stages connected by bounded queues, instead of one after the other
+        async_stages = processing_config.get("async_stages", False)
+        queue_size = processing_config.get("queue_size", DEFAULT_QUEUE_SIZE)
+
+        if async_stages:
+            # Parse the publication files concurrently, merging each table when ready
+            with metrics.stage("ingest_publications") as counters:
+                publications = asyncio.run(
+                    ingest_async(
+                        iter_input_paths(inputs, PUBLICATION_TABLE_NAMES),
+                        batch_size,
+                        manifest,
+                        silver_format=processing_config.get("silver_format", "arrow"),
+                        workers=processing_config.get("workers", 1),
+                        queue_size=queue_size,
+                        silver_dir=silver_dir,
+                    )
+                )
+                counters["rows"] = sum(len(publication["rows"]) for publication in publications)
+        else:
+            # Process publications
+            with metrics.stage("ingest_publications") as counters:
+                publications = process_publication(
+                    iter_input_paths(inputs, PUBLICATION_TABLE_NAMES),
+                    batch_size,
+                    manifest,
+                    silver_format=processing_config.get("silver_format", "arrow"),
+                    workers=processing_config.get("workers", 1),
+                    silver_dir=silver_dir,
+                )
+                counters["rows"] = sum(len(publication.get("rows", [])) for publication in publications)
+        metrics.count(
+            "ingest_publications",
+            input_bytes=sum(
+                item.size for item in inputs if item.table_name in PUBLICATION_TABLE_NAMES
+            ),
+        )
+
+        # Process drugs and their synonyms with retry mechanism, from the compiled
+        # drug dictionary when unchanged
+        with metrics.stage("ingest_drugs") as counters:
+            drugs = process_drugs(
+                drug_files[0],
+                batch_size,
+                manifest,
+                dictionary_path=silver_dir / "drugs.dictionary.pickle",
+                synonym_paths=sorted(iter_input_paths(inputs, ["synonyms"])),
+            )
+            drug_count = len(drugs.get("rows", []))
+            counters["rows"] = drug_count
+
+        # Find drug mentions, built one drug at a time while they are saved
+        with metrics.stage("match"):
+            all_mentions = find_drug_mentions(
+                drugs,
+                publications,
+                workers=processing_config.get("workers", 1),
+                chunk_size=processing_config.get("chunk_size", DEFAULT_CHUNK_SIZE),
+                stream=True,
+                match_mode=processing_config.get("match_mode", "substring"),
+            )
+
+        # Journal and drug statistics, accumulated while the mentions are saved
+        stats = MentionStats()
+        time_index = MentionTimeIndex()
+        all_mentions = time_index.track(stats.track(all_mentions))
 
         # Save results
-        output_path = Path(config.get("paths")["gold"]) / "drug_mentions.json"
-        save_to_json(all_mentions, output_path)
+        gold_dir = Path(config.get("paths")["gold"])
+        gold_format = processing_config.get("gold_format", "json")
+        extension = "ndjson" if gold_format == "ndjson" else "json"
+        output_path = gold_dir / f"drug_mentions.{extension}"
+
+        def save_gold(mentions):
+            if gold_format == "ndjson":
+                # NDJSON gold gets a sidecar index for random access by ATC code
+                save_ndjson_with_index(mentions, output_path)
+            else:
+                save_to_json(mentions, output_path, output_format=gold_format)
+
+        with metrics.stage("save_gold") as counters:
+            if async_stages:
+                # Match the next drugs while the previous ones are written
+                asyncio.run(overlap_stages(all_mentions, save_gold, queue_size))
+            else:
+                save_gold(all_mentions)
+            counters["rows"] = stats.observed
+
+        with metrics.stage("analysis"):
+            if stats.drug_codes:
+                top_k = config.get("analysis", {}).get("top_k", 10)
+                save_analysis_results(stats.to_dict(top_k), gold_dir / "mention_stats.json")
+                time_index.save(gold_dir / "mention_time_index.json")
+                top_journals = stats.top_journals(1)
+                if top_journals:
+                    save_analysis_results(top_journals[0], gold_dir / "journal_analysis.json")
+        manifest.save()
+
+        record_matcher_gauges(metrics, stats, drug_count)
 
         logging.info("Data processing pipeline completed successfully")
 
@@ -77,6 +236,9 @@ def main():
         logging.error(f"Pipeline failed: {str(e)}")
         raise
 
+    finally:
+        export_metrics()
+
 
 if __name__ == "__main__":
     main()
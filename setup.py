@@ -9,6 +9,12 @@ setup(
         'charset-normalizer>=2.0.0',
     ],
     extras_require={
+        'arrow': [
+            'pyarrow>=14.0.0',
+        ],
+        'graph': [
+            'scipy>=1.8.0',
+        ],
         'test': [
             'pytest>=6.2.5',
             'pytest-cov>=2.12.1',
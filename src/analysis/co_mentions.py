@@ -0,0 +1,222 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config.config import Config
+from src.utils.constants import PUBLICATION_TABLE_NAMES
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - depends on the installed extras
+    np = None
+    sparse = None
+
+# Kinds of co-mention: in the same publication or in the same journal
+CO_MENTION_KINDS = ("publication", "journal")
+
+
+class CoMentionGraph:
+    """
+    Drug co-mention graph built from sparse incidence matrices.
+
+    Each drug is a row of a drug x publication and a drug x journal matrix,
+    with a 1 where the drug is mentioned. The number of publications (or
+    journals) two drugs share is the product of their rows, so the full
+    co-mention matrix is A @ A.T and the neighbours of a single drug only
+    need the product of its row with A.T.
+    """
+
+    def __init__(self, drug_codes: List[str], incidence: Dict[str, "sparse.csr_matrix"]):
+        """
+        Args:
+            drug_codes: The ATC code of each row of the matrices
+            incidence: The drug x publication and drug x journal matrices, by kind
+        """
+        self.drug_codes = drug_codes
+        self.drug_ids = {code: row for row, code in enumerate(drug_codes)}
+        self.incidence = incidence
+        self._co_mentions: Dict[str, "sparse.csr_matrix"] = {}
+
+    @classmethod
+    def from_mentions(cls, mentions: Iterable[Dict]) -> "CoMentionGraph":
+        """
+        Build the graph from drug mentions, as produced by find_drug_mentions.
+
+        Args:
+            mentions: The mentions of each drug
+
+        Returns:
+            The co-mention graph
+
+        Raises:
+            ImportError: If scipy is not installed
+        """
+        if sparse is None:
+            message = "scipy is required for the co-mention graph, install the 'graph' extra"
+            logging.error(message)
+            raise ImportError(message)
+
+        drug_codes = []
+        columns = {kind: {} for kind in CO_MENTION_KINDS}
+        entries = {kind: ([], []) for kind in CO_MENTION_KINDS}
+
+        def add(kind, row, key):
+            column = columns[kind].setdefault(key, len(columns[kind]))
+            entries[kind][0].append(row)
+            entries[kind][1].append(column)
+
+        for mention in mentions:
+            drug_code = mention.get("drug")
+            if not drug_code:
+                logging.warning(f"Found drug mention without drug code: {mention}")
+                continue
+            row = len(drug_codes)
+            drug_codes.append(drug_code)
+
+            # Publications are identified by table, as ids are only unique per table
+            for table in PUBLICATION_TABLE_NAMES:
+                for publication in mention.get(table, []):
+                    add("publication", row, (table, publication.get("id")))
+            for journal in mention.get("journal", []):
+                if journal.get("name"):
+                    add("journal", row, journal["name"])
+
+        incidence = {}
+        for kind in CO_MENTION_KINDS:
+            rows, cols = entries[kind]
+            matrix = sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                shape=(len(drug_codes), len(columns[kind])),
+            )
+            # A drug may list the same publication or journal several times
+            matrix.data[:] = 1
+            incidence[kind] = matrix
+
+        logging.info(
+            f"Built co-mention graph of {len(drug_codes)} drugs, "
+            f"{incidence['publication'].shape[1]} publications and "
+            f"{incidence['journal'].shape[1]} journals"
+        )
+        return cls(drug_codes, incidence)
+
+    @classmethod
+    def from_file(cls, file_path: Path) -> "CoMentionGraph":
+        """
+        Build the graph from a gold drug mentions file.
+
+        Args:
+            file_path: Path to the drug mentions JSON file, or NDJSON file with a '.ndjson' suffix
+
+        Returns:
+            The co-mention graph
+        """
+        logging.info(f"Loading drug mentions data from: {file_path}")
+        with open(file_path, "r") as f:
+            if Path(file_path).suffix == ".ndjson":
+                return cls.from_mentions(json.loads(line) for line in f if line.strip())
+            return cls.from_mentions(json.load(f))
+
+    def _check_kind(self, kind: str) -> None:
+        if kind not in CO_MENTION_KINDS:
+            message = f"Co-mention kind must be one of {CO_MENTION_KINDS}, got '{kind}'."
+            logging.error(message)
+            raise ValueError(message)
+
+    def co_mentions(self, kind: str = "publication") -> "sparse.csr_matrix":
+        """
+        Get the full drug x drug co-mention matrix, computed once per kind.
+
+        Args:
+            kind: Either 'publication' or 'journal'
+
+        Returns:
+            The number of publications or journals shared by each pair of
+            different drugs, with an empty diagonal
+        """
+        self._check_kind(kind)
+        if kind not in self._co_mentions:
+            matrix = self.incidence[kind]
+            product = (matrix @ matrix.T).tocsr()
+            product = (product - sparse.diags(product.diagonal(), dtype=product.dtype)).tocsr()
+            product.eliminate_zeros()
+            self._co_mentions[kind] = product
+        return self._co_mentions[kind]
+
+    def neighbours(
+        self, atccode: str, kind: str = "publication", top: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Get the drugs mentioned in the same publications or journals as a drug.
+
+        Only the row of the drug is multiplied, so a query costs the number of
+        mentions it touches rather than the size of the full matrix.
+
+        Args:
+            atccode: The ATC code of the drug
+            kind: Either 'publication' or 'journal'
+            top: The maximum number of neighbours to return. Defaults to all.
+
+        Returns:
+            The neighbours and the number of publications or journals they
+            share with the drug, most shared first, then by ATC code
+        """
+        self._check_kind(kind)
+        row = self.drug_ids.get(atccode)
+        if row is None:
+            return []
+
+        if kind in self._co_mentions:
+            counts = self._co_mentions[kind].getrow(row)
+        else:
+            matrix = self.incidence[kind]
+            counts = (matrix.getrow(row) @ matrix.T).tocsr()
+
+        neighbours = [
+            (self.drug_codes[other], int(count))
+            for other, count in zip(counts.indices, counts.data)
+            if other != row and count
+        ]
+        neighbours.sort(key=lambda item: (-item[1], item[0]))
+        return neighbours[:top] if top is not None else neighbours
+
+    def to_dict(self, kind: str = "publication") -> Dict[str, Dict[str, int]]:
+        """
+        Args:
+            kind: Either 'publication' or 'journal'
+
+        Returns:
+            The non-zero co-mention counts of each drug, ready to be saved as JSON
+        """
+        matrix = self.co_mentions(kind).tocoo()
+        result: Dict[str, Dict[str, int]] = {}
+        for row, column, count in zip(matrix.row, matrix.col, matrix.data):
+            result.setdefault(self.drug_codes[row], {})[self.drug_codes[column]] = int(count)
+        return {code: dict(sorted(counts.items())) for code, counts in sorted(result.items())}
+
+
+def main():
+    """Compute the drug co-mention counts from the gold drug mentions."""
+    config = Config()
+
+    logging.info("Starting co-mention analysis")
+
+    gold_dir = Path(config.get("paths")["gold"])
+    gold_format = config.get("processing", {}).get("gold_format", "json")
+    extension = "ndjson" if gold_format == "ndjson" else "json"
+    graph = CoMentionGraph.from_file(gold_dir / f"drug_mentions.{extension}")
+
+    output_path = gold_dir / "co_mentions.json"
+    logging.info(f"Saving co-mention counts to: {output_path}")
+    with open(output_path, "w") as f:
+        json.dump({kind: graph.to_dict(kind) for kind in CO_MENTION_KINDS}, f, indent=4)
+
+    logging.info("Co-mention analysis completed")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    main()
@@ -1,25 +1,21 @@
 import json
 import logging
 from pathlib import Path
-from collections import defaultdict
 from typing import Dict, List, Optional
 
-from src.utils.retry import retry_on_error
+from src.utils.retry import configure_retries, retry_on_error
 from src.config.config import Config
+from src.analysis.mention_stats import MentionStats
+from src.utils.metrics import metrics_from_config
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 
-
-@retry_on_error(max_retries=3, retry_delay=1)
+@retry_on_error()
 def load_json_data(file_path: Path) -> List[Dict]:
     """
-    Load and validate drug mentions data from JSON file.
+    Load and validate drug mentions data from a JSON or NDJSON file.
 
     Args:
-        file_path: Path to the drug mentions JSON file
+        file_path: Path to the drug mentions JSON file, or NDJSON file with a '.ndjson' suffix
 
     Returns:
         List of drug mention dictionaries
@@ -30,7 +26,10 @@ def load_json_data(file_path: Path) -> List[Dict]:
     """
     logging.info(f"Loading drug mentions data from: {file_path}")
     with open(file_path, "r") as f:
-        data = json.load(f)
+        if Path(file_path).suffix == ".ndjson":
+            data = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
 
     if not isinstance(data, list):
         raise ValueError("Drug mentions data must be a list")
@@ -54,37 +53,19 @@ def analyze_journal_mentions(data: List[Dict]) -> Optional[Dict]:
         logging.warning("No drug mentions data available")
         return None
 
-    # Create a mapping of journals to the drugs they mention
-    journal_drugs = defaultdict(set)
-
-    # Process each drug mention
+    # Accumulate the drugs of each journal as integer-coded bitsets
+    stats = MentionStats()
     for drug_mention in data:
-        drug_code = drug_mention.get("drug")
-        if not drug_code:
-            logging.warning(f"Found drug mention without drug code: {drug_mention}")
-            continue
-
-        # Get all journal mentions for this drug
-        journal_mentions = drug_mention.get("journal", [])
-
-        # Add the drug to each journal's set of mentioned drugs
-        for mention in journal_mentions:
-            journal_name = mention.get("name")
-            if journal_name:
-                journal_drugs[journal_name].add(drug_code)
+        stats.observe(drug_mention)
 
-    if not journal_drugs:
+    top_journals = stats.top_journals(1)
+    if not top_journals:
         logging.warning("No valid journal mentions found in the data")
         return None
 
-    # Find the journal with the most drugs
-    journal_name = max(journal_drugs.items(), key=lambda x: len(x[1]))[0]
-
-    result = {
-        "name": journal_name,
-        "drug_count": len(journal_drugs[journal_name]),
-        "drugs": sorted(list(journal_drugs[journal_name])),
-    }
+    # The journal with the most drugs
+    result = top_journals[0]
+    journal_name = result["name"]
 
     logging.info(
         f"Found journal with most drugs: {journal_name} "
@@ -115,19 +96,30 @@ def main():
     """Main function to orchestrate the journal analysis."""
     # Load configuration
     config = Config()
+    configure_retries(config.get("processing", {}))
 
     logging.info("Starting journal analysis")
 
+    # Per-stage metrics of the run, exported when it ends
+    metrics, export_metrics = metrics_from_config("journal_stats", config)
+
     try:
         # Define input/output paths
-        input_path = Path(config.get("paths")["gold"]) / "drug_mentions.json"
+        gold_format = config.get("processing", {}).get("gold_format", "json")
+        extension = "ndjson" if gold_format == "ndjson" else "json"
+        input_path = Path(config.get("paths")["gold"]) / f"drug_mentions.{extension}"
         output_path = Path(config.get("paths")["gold"]) / "journal_analysis.json"
 
         # Load and validate data
-        data = load_json_data(input_path)
+        with metrics.stage("load") as counters:
+            data = load_json_data(input_path)
+            counters["rows"] = len(data)
+            counters["bytes_read"] = input_path.stat().st_size
 
         # Analyze journal mentions
-        results = analyze_journal_mentions(data)
+        with metrics.stage("analyze") as counters:
+            results = analyze_journal_mentions(data)
+            counters["rows"] = len(data)
 
         if results:
             # Save analysis results
@@ -145,8 +137,14 @@ def main():
         logging.error(f"Analysis failed: {str(e)}")
         raise
 
+    finally:
+        export_metrics()
+
     logging.info("Journal analysis completed")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
     main()
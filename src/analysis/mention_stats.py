@@ -0,0 +1,188 @@
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.utils.constants import PUBLICATION_TABLE_NAMES
+from src.utils.dates import day_to_date
+
+UNKNOWN_BUCKET = "unknown"
+
+
+def date_bucket(day: Optional[int]) -> str:
+    """
+    Get the month bucket of a publication day number.
+
+    Args:
+        day: The day number of the publication date, as carried by the mention
+             entries, or None if the date could not be parsed.
+
+    Returns:
+        The bucket as 'YYYY-MM', or 'unknown' without a day number.
+    """
+    if day is None:
+        return UNKNOWN_BUCKET
+    return day_to_date(day).strftime("%Y-%m")
+
+
+class MentionStats:
+    """
+    Journal and drug statistics accumulated in a single pass over the drug mentions.
+
+    Drugs and journals are coded as integers in the order they are first
+    seen. The drugs of each journal are kept as a bitset (a Python integer
+    with bit i set for drug i), so distinct-drug counts are bit counts.
+    Drugs sharing an ATC code share their bit. Likewise, the journals of each
+    ATC code are kept as a bitset of journals, so a journal mentioning
+    several drugs of the code is counted once.
+    """
+
+    def __init__(self):
+        self.drug_codes: List[str] = []
+        self.observed: int = 0
+        self._drug_ids: Dict[str, int] = {}
+        self._drug_journals: List[int] = []
+        self.journal_names: List[str] = []
+        self._journal_ids: Dict[str, int] = {}
+        self._journal_drugs: List[int] = []
+        self.drug_stats: Dict[str, Dict[str, int]] = {}
+        self.date_buckets: Dict[str, int] = {}
+
+    def observe(self, mention: Dict) -> None:
+        """
+        Add the mentions of one drug to the statistics.
+
+        Args:
+            mention: The mentions of a drug, as produced by find_drug_mentions
+        """
+        drug_code = mention.get("drug")
+        if not drug_code:
+            logging.warning(f"Found drug mention without drug code: {mention}")
+            return
+
+        self.observed += 1
+        drug_id = self._drug_ids.get(drug_code)
+        if drug_id is None:
+            drug_id = len(self.drug_codes)
+            self._drug_ids[drug_code] = drug_id
+            self.drug_codes.append(drug_code)
+            self._drug_journals.append(0)
+        drug_bit = 1 << drug_id
+
+        journals = 0
+        for journal_mention in mention.get("journal", []):
+            journal_name = journal_mention.get("name")
+            if not journal_name:
+                continue
+            journal_id = self._journal_ids.get(journal_name)
+            if journal_id is None:
+                journal_id = len(self.journal_names)
+                self._journal_ids[journal_name] = journal_id
+                self.journal_names.append(journal_name)
+                self._journal_drugs.append(0)
+            self._journal_drugs[journal_id] |= drug_bit
+            journals |= 1 << journal_id
+        self._drug_journals[drug_id] |= journals
+
+        mention_count = 0
+        for table in PUBLICATION_TABLE_NAMES:
+            for publication in mention.get(table, []):
+                bucket = date_bucket(publication.get("day"))
+                self.date_buckets[bucket] = self.date_buckets.get(bucket, 0) + 1
+                mention_count += 1
+
+        stats = self.drug_stats.setdefault(
+            drug_code, {"journal_count": 0, "mention_count": 0}
+        )
+        # Distinct journals of all the drugs of the code
+        stats["journal_count"] = bin(self._drug_journals[drug_id]).count("1")
+        stats["mention_count"] += mention_count
+
+    def track(self, mentions: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Observe mentions while they flow to another consumer, such as the gold writer.
+
+        Args:
+            mentions: The mentions of each drug
+
+        Yields:
+            Each mention, after it has been observed
+        """
+        for mention in mentions:
+            self.observe(mention)
+            yield mention
+
+    def journal_drugs(self, journal_id: int) -> List[str]:
+        """
+        Args:
+            journal_id: The integer code of a journal
+
+        Returns:
+            The sorted ATC codes of the drugs mentioned in the journal
+        """
+        bits = self._journal_drugs[journal_id]
+        codes = []
+        while bits:
+            low_bit = bits & -bits
+            codes.append(self.drug_codes[low_bit.bit_length() - 1])
+            bits ^= low_bit
+        return sorted(codes)
+
+    def journal_drug_count(self, journal_id: int) -> int:
+        """
+        Args:
+            journal_id: The integer code of a journal
+
+        Returns:
+            The number of different drugs mentioned in the journal
+        """
+        return bin(self._journal_drugs[journal_id]).count("1")
+
+    def journal_counts(self) -> Dict[str, int]:
+        """
+        Returns:
+            The number of different drugs mentioned in each journal
+        """
+        return {
+            name: self.journal_drug_count(journal_id)
+            for journal_id, name in enumerate(self.journal_names)
+        }
+
+    def top_journals(self, k: int = 10) -> List[Dict]:
+        """
+        Get the journals mentioning the most different drugs.
+
+        Ties are broken by the order in which journals were first seen.
+
+        Args:
+            k: The number of journals to return
+
+        Returns:
+            The top journals with their name, drug count and drugs
+        """
+        counts = [
+            (self.journal_drug_count(journal_id), journal_id)
+            for journal_id in range(len(self.journal_names))
+        ]
+        counts.sort(key=lambda item: (-item[0], item[1]))
+        return [
+            {
+                "name": self.journal_names[journal_id],
+                "drug_count": count,
+                "drugs": self.journal_drugs(journal_id),
+            }
+            for count, journal_id in counts[:k]
+        ]
+
+    def to_dict(self, k: int = 10) -> Dict:
+        """
+        Args:
+            k: The number of top journals to include
+
+        Returns:
+            All the statistics, ready to be saved as JSON
+        """
+        return {
+            "journals": self.journal_counts(),
+            "top_journals": self.top_journals(k),
+            "drugs": self.drug_stats,
+            "date_buckets": dict(sorted(self.date_buckets.items())),
+        }
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.constants import DEFAULT_BATCH_SIZE, PUBLICATION_TABLE_NAMES
+from src.utils.file import get_name_from_path, process_file
+from src.utils.silver import resolve_format
+from src.utils.utils import (
+    build_publication,
+    find_cached_tables,
+    load_cached_table,
+    save_silver_table,
+)
+
+# Number of items buffered between two stages
+DEFAULT_QUEUE_SIZE = 64
+
+# Marks the end of the items of a queue
+_DONE = object()
+
+
+async def _feed(file_paths, paths_queue, workers):
+    """Put the paths on the queue, then one end marker per worker"""
+    for file_path in file_paths:
+        await paths_queue.put(file_path)
+    for _ in range(workers):
+        await paths_queue.put(_DONE)
+
+
+async def _parse(paths_queue, results_queue, executor, batch_size, manifest):
+    """Parse the files taken from the queue in the process pool"""
+    loop = asyncio.get_running_loop()
+    while True:
+        file_path = await paths_queue.get()
+        if file_path is _DONE:
+            await results_queue.put(_DONE)
+            return
+        if manifest is not None and await asyncio.to_thread(manifest.is_unchanged, file_path):
+            # Read from the manifest cache when the table is merged
+            result = None
+        else:
+            result = await loop.run_in_executor(executor, process_file, file_path, batch_size)
+        await results_queue.put((file_path, result))
+
+
+async def _merge(
+    results_queue, workers, table_files, batch_size, manifest, silver_format, silver_dir
+):
+    """
+    Merge the parsed files of each table as soon as all its files are parsed,
+    writing its silver table and index while other files are still parsed.
+    """
+    remaining = {table: len(paths) for table, paths in table_files.items()}
+    parsed = {}
+    tables = {}
+    finishing = []
+
+    async def finish(table):
+        rows, files = [], []
+        for file_path in sorted(table_files[table], key=str):
+            result = parsed.pop(file_path)
+            if manifest is not None:
+                # Hashing and caching the file, or reading its cache, off the event loop
+                result = await asyncio.to_thread(
+                    manifest.process_file, file_path, batch_size, result
+                )
+            rows.extend(result["valid_rows"])
+            files.append((file_path, len(result["valid_rows"])))
+        await asyncio.to_thread(
+            save_silver_table, table, rows, files, manifest, silver_format, silver_dir
+        )
+        tables[table] = await asyncio.to_thread(build_publication, table, rows, files, silver_dir)
+        logging.info(f"Ingested {len(rows)} rows of {table} from {len(files)} files")
+
+    done_workers = 0
+    while done_workers < workers:
+        item = await results_queue.get()
+        if item is _DONE:
+            done_workers += 1
+            continue
+        file_path, result = item
+        parsed[file_path] = result
+        table = get_name_from_path(file_path)
+        remaining[table] -= 1
+        if remaining[table] == 0:
+            finishing.append(asyncio.create_task(finish(table)))
+    await asyncio.gather(*finishing)
+    return tables
+
+
+async def ingest_async(
+    file_paths,
+    batch_size=DEFAULT_BATCH_SIZE,
+    manifest=None,
+    silver_format="arrow",
+    workers=1,
+    queue_size=DEFAULT_QUEUE_SIZE,
+    silver_dir="data/silver",
+):
+    """
+    Ingest the bronze files as concurrent stages connected by bounded queues.
+
+    Paths are fed to parser tasks, each handing one file at a time to a pool
+    of processes, so reading a file from slow storage overlaps with parsing
+    the others. Parsed files are merged per table as soon as the last file
+    of the table is parsed, and its silver table and title index are written
+    while the files of other tables are still being parsed.
+
+    Args:
+        file_paths (iterable): The paths of the publication files, preferably largest
+                               first. Files of other tables are ignored.
+        batch_size (int, optional): The number of rows read and validated at a time.
+        manifest (Manifest, optional): The manifest used to skip unchanged files.
+        silver_format (str, optional): Either 'arrow' or 'json'. Defaults to 'arrow'.
+        workers (int, optional): The number of files parsed at once. Defaults to 1.
+        queue_size (int, optional): The number of items buffered between stages.
+        silver_dir (Path, optional): The silver layer directory. Defaults to 'data/silver'.
+
+    Returns:
+        list: The publications, as returned by process_publication.
+    """
+    silver_format = resolve_format(silver_format)
+    workers = max(1, workers)
+
+    # Files are fed to the parsers in the order they were given, largest first
+    # when they come from discover_inputs
+    file_paths = list(file_paths)
+    table_of = {file_path: get_name_from_path(file_path) for file_path in file_paths}
+    table_files = {}
+    for file_path in file_paths:
+        if table_of[file_path] in PUBLICATION_TABLE_NAMES:
+            table_files.setdefault(table_of[file_path], []).append(file_path)
+
+    # Unchanged publication tables are read back from the silver layer
+    cached_tables = await asyncio.to_thread(
+        find_cached_tables, table_files, manifest, silver_format, silver_dir
+    )
+    pending = {
+        table: paths for table, paths in table_files.items() if table not in cached_tables
+    }
+
+    paths_queue = asyncio.Queue(queue_size)
+    results_queue = asyncio.Queue(queue_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        stages = [
+            _feed(
+                [file_path for file_path in file_paths if table_of.get(file_path) in pending],
+                paths_queue,
+                workers,
+            ),
+            _merge(
+                results_queue, workers, pending, batch_size, manifest, silver_format, silver_dir
+            ),
+        ]
+        stages.extend(
+            _parse(paths_queue, results_queue, executor, batch_size, manifest)
+            for _ in range(workers)
+        )
+        tables = (await asyncio.gather(*stages))[1]
+
+    publications = []
+    for table in PUBLICATION_TABLE_NAMES:
+        if table in cached_tables:
+            rows, files = await asyncio.to_thread(
+                load_cached_table, table, table_files[table], silver_format, silver_dir
+            )
+            publications.append(
+                await asyncio.to_thread(build_publication, table, rows, files, silver_dir)
+            )
+        else:
+            publications.append(tables.get(table) or build_publication(table, [], [], silver_dir))
+    return publications
+
+
+def _put(items_queue, item, stop):
+    """Put an item on a bounded queue, unless the consumer stopped"""
+    while not stop.is_set():
+        try:
+            items_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(items_queue, errors):
+    """
+    Yield the items of a queue until the end marker, then raise the error of
+    the producer if it failed, so the consumer does not commit partial output.
+    """
+    while True:
+        item = items_queue.get()
+        if item is _DONE:
+            break
+        yield item
+    if errors:
+        raise errors[0]
+
+
+async def overlap_stages(items, consume, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Produce items and consume them in two threads connected by a bounded queue.
+
+    Producing the items, for example matching drug mentions, then overlaps
+    with consuming them, for example writing them to the gold layer, and the
+    producer waits when the consumer falls behind.
+
+    Args:
+        items (iterable): The items, produced lazily as they are iterated.
+        consume (callable): Called with an iterator over the items.
+        queue_size (int, optional): The maximum number of items waiting to be consumed.
+
+    Returns:
+        The return value of consume.
+    """
+    items_queue = queue.Queue(queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def produce():
+        try:
+            for item in items:
+                if not _put(items_queue, item, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            raise
+        finally:
+            _put(items_queue, _DONE, stop)
+
+    def consume_all():
+        try:
+            return consume(_drain(items_queue, errors))
+        finally:
+            stop.set()
+
+    producer = asyncio.to_thread(produce)
+    consumer = asyncio.to_thread(consume_all)
+    return (await asyncio.gather(producer, consumer))[1]
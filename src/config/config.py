@@ -25,10 +25,39 @@ class Config:
                 "silver": "data/silver",
                 "gold": "data/gold"
             },
+            "inputs": {
+                "drugs": ["drugs*.csv", "drugs*.json"],
+                "pubmed": ["pubmed*.csv", "pubmed*.json"],
+                "clinical_trials": ["clinical_trials*.csv", "clinical_trials*.json"],
+                "synonyms": ["synonyms*.csv", "synonyms*.json"]
+            },
             "processing": {
                 "batch_size": 1000,
                 "max_retries": 3,
-                "retry_delay": 1  # seconds
+                "retry_delay": 1,  # seconds
+                "retry_backoff": 2,
+                "retry_max_delay": 30,  # seconds
+                "retry_budget": 10,  # retries per run
+                "workers": 4,
+                "chunk_size": 10000,
+                "silver_format": "arrow",
+                "gold_format": "json",
+                "async_stages": False,
+                "queue_size": 64,
+                "match_mode": "substring"
+            },
+            "metrics": {
+                "enabled": True,
+                "profile": False,
+                "tracemalloc": False
+            },
+            "service": {
+                "host": "127.0.0.1",
+                "port": 8080,
+                "reload_interval": 5  # seconds
+            },
+            "analysis": {
+                "top_k": 10
             },
             "logging": {
                 "level": "INFO",
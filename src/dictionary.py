@@ -0,0 +1,176 @@
+import logging
+import pickle
+from pathlib import Path
+
+from src.index import fingerprint_sources, tokenize
+from src.matcher import DrugMatcher
+from src.utils.constants import SCHEMA
+from src.utils.text import normalize_text
+
+# Version of the pickled dictionary format, dictionaries of another version are rebuilt
+DICTIONARY_VERSION = 3
+
+
+class DrugDictionary:
+    """
+    Drug names compiled for matching, with the drug rows they come from.
+
+    The names are the drug names followed by their synonyms, such as brand
+    names, each mapped to the drug with the same ATC code. Every name is
+    compiled into the same matchers, so synonyms add states to the automaton
+    rather than passes over the titles.
+
+    Names are normalized once when the dictionary is built, and both the
+    matcher over the full names and the matcher over the title index keys
+    of the names are built ahead of time, as is the matcher over the names
+    normalized for matching on word boundaries. The dictionary is pickled together
+    with a fingerprint of its source files, and is reloaded only while those
+    files are unchanged, so unchanged drugs are neither parsed nor compiled
+    again.
+    """
+
+    def __init__(self, rows, search_column, sources=None, synonyms=None):
+        """
+        Args:
+            rows (list): The drug rows.
+            search_column (str): The name of the column containing the drug names.
+            sources (list, optional): The fingerprints of the source files.
+            synonyms (list, optional): The rows of the synonyms table, with the ATC
+                                       code and an alternate name of a drug.
+        """
+        self.rows = rows
+        self.search_column = search_column
+        self.sources = sources or []
+        self.names = [row[search_column] for row in rows]
+        # The position of the drug of each name
+        self.drug_ids = list(range(len(rows)))
+
+        drug_ids = {}
+        for drug_id, row in enumerate(rows):
+            drug_ids.setdefault(row["atccode"], []).append(drug_id)
+        unknown = 0
+        for synonym in synonyms or []:
+            if synonym["atccode"] not in drug_ids:
+                unknown += 1
+                continue
+            for drug_id in drug_ids[synonym["atccode"]]:
+                self.names.append(synonym["synonym"])
+                self.drug_ids.append(drug_id)
+        if unknown:
+            logging.warning(f"Skipped {unknown} synonyms of unknown ATC codes")
+        self.patterns = [name.lower() for name in self.names]
+        # The longest token of each name, looked up in the title indexes
+        self.keys = [max(tokenize(pattern), key=len, default="") for pattern in self.patterns]
+        self.matcher = DrugMatcher(self.patterns)
+        self.key_matcher = DrugMatcher(self.keys)
+        # The normalized names and their matcher, for matching on word boundaries
+        self.word_patterns = [normalize_text(name) for name in self.names]
+        self.word_matcher = DrugMatcher(self.word_patterns)
+
+    def group_matches(self, matches):
+        """
+        Merge the matches of the synonyms of each drug with those of its name.
+
+        Args:
+            matches (list): For each name, the sorted ids of the rows containing it.
+
+        Returns:
+            list: For each drug, the sorted ids of the rows containing any of its names.
+        """
+        if len(self.names) == len(self.rows):
+            return matches
+        grouped = [set() for _ in self.rows]
+        for drug_id, row_ids in zip(self.drug_ids, matches):
+            grouped[drug_id].update(row_ids)
+        return [sorted(row_ids) for row_ids in grouped]
+
+    def to_drugs(self):
+        """
+        Returns:
+            dict: The drugs in the format expected by find_drug_mentions.
+        """
+        return {"rows": self.rows, "search_column": self.search_column, "dictionary": self}
+
+    def save(self, file_path):
+        """
+        Pickle the dictionary and the fingerprint of its sources.
+
+        Args:
+            file_path (Path): The path of the dictionary file.
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_path.open("wb") as file:
+            pickle.dump(
+                {"version": DICTIONARY_VERSION, "dictionary": self},
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        logging.info(f"Drug dictionary saved to: {file_path}")
+
+    @classmethod
+    def load(cls, file_path, source_paths):
+        """
+        Load a dictionary if its source files are unchanged.
+
+        The content hash of a source file is only recomputed when its size or
+        mtime differs from the stored fingerprint.
+
+        Args:
+            file_path (Path): The path of the dictionary file.
+            source_paths (list): The paths of the files the dictionary must be built from.
+
+        Returns:
+            DrugDictionary: The loaded dictionary, or None if the file is missing or stale.
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            return None
+        try:
+            with file_path.open("rb") as file:
+                data = pickle.load(file)
+        except (pickle.UnpicklingError, AttributeError, EOFError, ImportError) as e:
+            logging.warning(f"Drug dictionary is unreadable: {file_path} ({str(e)})")
+            return None
+        if data.get("version") != DICTIONARY_VERSION:
+            logging.info(f"Drug dictionary has another version: {file_path}")
+            return None
+
+        dictionary = data["dictionary"]
+        sources = fingerprint_sources(source_paths, dictionary.sources)
+        if [(s["path"], s["hash"]) for s in sources] != [
+            (s["path"], s["hash"]) for s in dictionary.sources
+        ]:
+            logging.info(f"Drug dictionary is stale: {file_path}")
+            return None
+
+        dictionary.sources = sources
+        logging.info(f"Drug dictionary loaded from: {file_path}")
+        return dictionary
+
+
+def load_or_build_dictionary(rows_loader, source_paths, file_path, synonyms_loader=None):
+    """
+    Load the drug dictionary, rebuilding and saving it when its sources changed.
+
+    Args:
+        rows_loader (callable): Called without arguments to read the drug rows,
+                                only when the dictionary must be rebuilt.
+        source_paths (list): The paths of the files the rows and synonyms are read from.
+        file_path (Path): The path of the dictionary file.
+        synonyms_loader (callable, optional): Called without arguments to read the
+                                              synonym rows, when the dictionary is rebuilt.
+
+    Returns:
+        DrugDictionary: The compiled drugs.
+    """
+    dictionary = DrugDictionary.load(file_path, source_paths)
+    if dictionary is None:
+        dictionary = DrugDictionary(
+            rows_loader(),
+            SCHEMA["search_column"]["drugs"],
+            fingerprint_sources(source_paths),
+            synonyms_loader() if synonyms_loader is not None else None,
+        )
+        dictionary.save(file_path)
+    return dictionary
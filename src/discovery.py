@@ -0,0 +1,76 @@
+import logging
+from pathlib import Path
+from typing import NamedTuple
+
+from src.utils.constants import DEFAULT_INPUT_PATTERNS
+from src.utils.file import get_name_from_path
+
+
+class InputFile(NamedTuple):
+    """Bronze file found by discover_inputs, with its stat info"""
+
+    path: Path
+    table_name: str
+    size: int
+    mtime_ns: int
+
+
+def discover_inputs(bronze_dir, patterns=None):
+    """
+    Find the input files of each table with glob patterns, and stat them once.
+
+    A file matched by the patterns of a table must also be recognised as
+    that table by its name, since the readers pick the schema from the file
+    name. Files matched by several patterns are listed once.
+
+    Args:
+        bronze_dir (Path): The bronze layer directory the patterns are relative to.
+        patterns (dict, optional): The glob patterns of each table, as in the 'inputs'
+                                   section of the configuration. Defaults to
+                                   DEFAULT_INPUT_PATTERNS.
+
+    Returns:
+        list: The InputFile of each file, largest first, then by path.
+    """
+    bronze_dir = Path(bronze_dir)
+    patterns = patterns or DEFAULT_INPUT_PATTERNS
+
+    inputs = {}
+    for table_name, table_patterns in patterns.items():
+        if isinstance(table_patterns, str):
+            table_patterns = [table_patterns]
+        for pattern in table_patterns:
+            for path in bronze_dir.glob(pattern):
+                if path in inputs or not path.is_file():
+                    continue
+                if get_name_from_path(path) != table_name:
+                    logging.warning(
+                        f"Skipping {path}: matched by the {table_name} inputs but "
+                        f"its name does not identify the table"
+                    )
+                    continue
+                stat = path.stat()
+                inputs[path] = InputFile(path, table_name, stat.st_size, stat.st_mtime_ns)
+
+    discovered = sorted(inputs.values(), key=lambda item: (-item.size, str(item.path)))
+    logging.info(
+        f"Discovered {len(discovered)} input files "
+        f"({sum(item.size for item in discovered)} bytes) in {bronze_dir}"
+    )
+    return discovered
+
+
+def iter_input_paths(inputs, table_names):
+    """
+    Lazily yield the paths of the input files of some tables, in input order.
+
+    Args:
+        inputs (iterable): The InputFile of each file, as returned by discover_inputs.
+        table_names (list): The tables whose files are wanted.
+
+    Yields:
+        Path: The path of each file of the tables.
+    """
+    for item in inputs:
+        if item.table_name in table_names:
+            yield item.path
@@ -0,0 +1,309 @@
+import json
+import hashlib
+import logging
+from pathlib import Path
+
+from src.matcher import match_texts
+from src.utils.constants import DEFAULT_CHUNK_SIZE
+from src.utils.file import get_file_fingerprint
+
+
+def tokenize(text):
+    """
+    Split a text into normalized tokens.
+
+    Tokens are the whitespace separated parts of the lowercased text, so a
+    name without whitespace occurs in a text if and only if it occurs in one
+    of its tokens.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list: The normalized tokens of the text.
+    """
+    return text.lower().split()
+
+
+class TitleIndex:
+    """
+    Inverted index mapping normalized title tokens to publication row ids.
+
+    Row ids are the positions of the rows in the table the index was built
+    from. The index can be persisted to disk together with a fingerprint of
+    its source files, and is reloaded only while those files are unchanged.
+    The result of the last lookup is persisted next to it, so that looking up
+    the same names again costs nothing.
+    """
+
+    def __init__(self, postings=None, size=0, sources=None, path=None):
+        """
+        Args:
+            postings (dict, optional): A mapping of token to sorted row ids.
+            size (int, optional): The number of rows in the indexed table.
+            sources (list, optional): The fingerprints of the source files.
+            path (Path, optional): The path the index is persisted to.
+        """
+        self.postings = postings or {}
+        self.size = size
+        self.sources = sources or []
+        self.path = Path(path) if path else None
+
+    @classmethod
+    def build(cls, rows, search_column):
+        """
+        Build the index over one column of a table.
+
+        Args:
+            rows (list): The rows of the table.
+            search_column (str): The name of the column to index.
+
+        Returns:
+            TitleIndex: The index over the column.
+        """
+        logging.debug(f"Building title index over column '{search_column}'")
+        postings = {}
+        for row_id, row in enumerate(rows):
+            for token in set(tokenize(row[search_column])):
+                postings.setdefault(token, []).append(row_id)
+        return cls(postings, len(rows))
+
+    def lookup(
+        self,
+        names,
+        rows,
+        search_column,
+        workers=1,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        persist=True,
+        dictionary=None,
+    ):
+        """
+        Find the rows containing each name using the index vocabulary only.
+
+        A matcher is run over the distinct tokens of the index instead of over
+        every title. A name containing whitespace cannot be matched token by
+        token: its longest part selects the candidate rows, which are then
+        checked against the full title.
+
+        Args:
+            names (list): The names to look up.
+            rows (list): The rows of the indexed table.
+            search_column (str): The name of the indexed column.
+            workers (int, optional): The number of processes matching the vocabulary.
+            chunk_size (int, optional): The number of tokens per worker task.
+            persist (bool, optional): Reuse and persist the result of the last lookup.
+                                      Disable it for ad-hoc lookups. Defaults to True.
+            dictionary (DrugDictionary, optional): The names compiled ahead of time,
+                                                   reusing their patterns and key matcher.
+
+        Returns:
+            list: For each name, the sorted ids of the rows containing it.
+        """
+        key = hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()
+        cached = self._load_lookup() if persist else None
+        if cached and cached["key"] == key:
+            logging.debug(f"Reusing cached lookup of title index: {self.path}")
+            return cached["results"]
+
+        if dictionary is not None:
+            patterns, keys, matcher = dictionary.patterns, dictionary.keys, dictionary.key_matcher
+        else:
+            patterns = [name.lower() for name in names]
+            keys = [max(tokenize(pattern), key=len, default="") for pattern in patterns]
+            matcher = None
+        tokens = list(self.postings)
+
+        results = [set() for _ in keys]
+        for position, found in match_texts(keys, tokens, workers, chunk_size, matcher):
+            row_ids = self.postings[tokens[position]]
+            for index in found:
+                results[index].update(row_ids)
+
+        for index, (pattern, key) in enumerate(zip(patterns, keys)):
+            if pattern == key:
+                continue
+            candidates = results[index] if key else range(self.size)
+            results[index] = {
+                row_id
+                for row_id in candidates
+                if pattern in rows[row_id][search_column].lower()
+            }
+        results = [sorted(row_ids) for row_ids in results]
+        if persist:
+            self._save_lookup({"key": key, "results": results})
+        return results
+
+    def _lookup_path(self):
+        return self.path.with_suffix(".lookup.json") if self.path else None
+
+    def _load_lookup(self):
+        """
+        Load the persisted result of the last lookup, if any.
+
+        Returns:
+            dict: The hash of the names looked up and the results, or None.
+        """
+        lookup_path = self._lookup_path()
+        if lookup_path is None or not lookup_path.exists():
+            return None
+        with lookup_path.open("r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _save_lookup(self, lookup):
+        """
+        Persist the result of a lookup next to the index.
+
+        Args:
+            lookup (dict): The hash of the names looked up and the results.
+        """
+        lookup_path = self._lookup_path()
+        if lookup_path is None:
+            return
+        with lookup_path.open("w", encoding="utf-8") as file:
+            json.dump(lookup, file)
+
+    def save(self, file_path):
+        """
+        Save the index and the fingerprint of its sources to a JSON file.
+
+        Args:
+            file_path (Path): The path of the index file.
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_path.open("w", encoding="utf-8") as file:
+            json.dump(
+                {"sources": self.sources, "size": self.size, "postings": self.postings},
+                file,
+            )
+        lookup_path = file_path.with_suffix(".lookup.json")
+        if lookup_path.exists():
+            lookup_path.unlink()
+        self.path = file_path
+        logging.info(f"Title index saved to: {file_path}")
+
+    @classmethod
+    def load(cls, file_path, source_paths):
+        """
+        Load an index from a JSON file if its source files are unchanged.
+
+        The content hash of a source file is only recomputed when its size or
+        mtime differs from the stored fingerprint.
+
+        Args:
+            file_path (Path): The path of the index file.
+            source_paths (list): The paths of the files the index must be built from.
+
+        Returns:
+            TitleIndex: The loaded index, or None if the file is missing or stale.
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            return None
+        with file_path.open("r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        sources = fingerprint_sources(source_paths, data.get("sources"))
+        if [(s["path"], s["hash"]) for s in sources] != [
+            (s["path"], s["hash"]) for s in data.get("sources", [])
+        ]:
+            logging.info(f"Title index is stale: {file_path}")
+            return None
+
+        logging.info(f"Title index loaded from: {file_path}")
+        return cls(data["postings"], data["size"], sources, file_path)
+
+
+class SegmentedIndex:
+    """
+    A table index made of one TitleIndex per source file.
+
+    Each segment indexes the rows of one file, so a new or changed file only
+    requires building and looking up its own segment.
+    """
+
+    def __init__(self, segments):
+        """
+        Args:
+            segments (list): The indexes of the source files, in row order.
+        """
+        self.segments = segments
+        self.size = sum(segment.size for segment in segments)
+
+    def lookup(
+        self,
+        names,
+        rows,
+        search_column,
+        workers=1,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        persist=True,
+        dictionary=None,
+    ):
+        """
+        Find the rows containing each name by looking up every segment.
+
+        Args:
+            names (list): The names to look up.
+            rows (list): The rows of the table, in segment order.
+            search_column (str): The name of the indexed column.
+            workers (int, optional): The number of processes matching the vocabulary.
+            chunk_size (int, optional): The number of tokens per worker task.
+            persist (bool, optional): Reuse and persist the result of the last lookup
+                                      of each segment. Defaults to True.
+            dictionary (DrugDictionary, optional): The names compiled ahead of time.
+
+        Returns:
+            list: For each name, the sorted ids of the rows containing it.
+        """
+        results = [[] for _ in names]
+        offset = 0
+        for segment in self.segments:
+            segment_rows = rows[offset : offset + segment.size]
+            found = segment.lookup(
+                names, segment_rows, search_column, workers, chunk_size, persist, dictionary
+            )
+            for row_ids, segment_row_ids in zip(results, found):
+                row_ids.extend(offset + row_id for row_id in segment_row_ids)
+            offset += segment.size
+        return results
+
+
+def load_or_build_index(rows, search_column, source_paths, file_path):
+    """
+    Load the title index of a table, rebuilding and saving it when its sources changed.
+
+    Args:
+        rows (list): The rows of the table.
+        search_column (str): The name of the column to index.
+        source_paths (list): The paths of the files the rows were read from.
+        file_path (Path): The path of the index file.
+
+    Returns:
+        TitleIndex: The index over the column.
+    """
+    index = TitleIndex.load(file_path, source_paths)
+    if index is None or index.size != len(rows):
+        index = TitleIndex.build(rows, search_column)
+        index.sources = fingerprint_sources(source_paths)
+        index.save(file_path)
+    return index
+
+
+def fingerprint_sources(file_paths, previous=None):
+    """
+    Compute the fingerprint of the source files of an index.
+
+    Args:
+        file_paths (list): The paths of the source files.
+        previous (list, optional): The fingerprints stored with an existing index.
+
+    Returns:
+        list: One dictionary per file with its path, size, mtime and content hash.
+    """
+    known = {source["path"]: source for source in previous or []}
+    return [
+        get_file_fingerprint(file_path, known.get(str(file_path)))
+        for file_path in file_paths
+    ]
@@ -0,0 +1,133 @@
+import json
+import logging
+from pathlib import Path
+
+from src.records import records_from_columns
+from src.utils.constants import DEFAULT_BATCH_SIZE
+from src.utils.file import (
+    get_cache_name,
+    get_file_fingerprint,
+    get_name_from_path,
+    iter_file,
+    merge_chunks,
+)
+from src.utils.silver import silver_columns
+
+# Version of the cached rows format, entries with another version are parsed again
+CACHE_VERSION = 3
+
+
+class Manifest:
+    """
+    Record of the bronze files processed by previous pipeline runs.
+
+    For each input file the manifest stores its size, mtime and content hash
+    together with its parse results: the number of valid and invalid rows and
+    the cache file holding the parsed rows. Unchanged files are then read
+    from the cache instead of being decoded and validated again.
+    """
+
+    def __init__(self, manifest_path, cache_dir=None):
+        """
+        Args:
+            manifest_path (Path): The path of the manifest file.
+            cache_dir (Path, optional): The directory holding the parsed rows.
+                                        Defaults to a 'cache' directory next to the manifest.
+        """
+        self.manifest_path = Path(manifest_path)
+        self.cache_dir = (
+            Path(cache_dir) if cache_dir else self.manifest_path.parent / "cache"
+        )
+        self.entries = self._load()
+
+    def _load(self):
+        """Load the manifest entries, or start empty if there is no manifest"""
+        if not self.manifest_path.exists():
+            return {}
+        with self.manifest_path.open("r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def save(self):
+        """Save the manifest entries"""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.manifest_path.open("w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=4)
+        logging.info(f"Manifest saved to: {self.manifest_path}")
+
+    def is_unchanged(self, file_path):
+        """
+        Check whether a file is unchanged since it was last processed.
+
+        Args:
+            file_path (Path): The path to the file.
+
+        Returns:
+            bool: True if the file was processed before and has the same content hash.
+        """
+        entry = self.entries.get(str(file_path))
+        if (
+            entry is None
+            or entry.get("version") != CACHE_VERSION
+            or not Path(entry["cache"]).exists()
+        ):
+            return False
+        fingerprint = get_file_fingerprint(file_path, entry)
+        if fingerprint["hash"] != entry["hash"]:
+            return False
+        # Keep the stored mtime current so the hash is not recomputed next time
+        entry.update(fingerprint)
+        return True
+
+    def process_file(self, file_path, batch_size=DEFAULT_BATCH_SIZE, result=None):
+        """
+        Read the validated rows of a file, from the cache when it is unchanged.
+
+        Args:
+            file_path (Path): The path to the file.
+            batch_size (int, optional): The number of rows read and validated at a time.
+            result (dict, optional): The rows of the file, if it was already parsed,
+                                     for example by a worker process. They are only cached.
+
+        Returns:
+            dict: A dictionary containing the list of valid records and of invalid rows.
+        """
+        if result is None and self.is_unchanged(file_path):
+            logging.info(f"Skipping unchanged file: {file_path}")
+            with Path(self.entries[str(file_path)]["cache"]).open(
+                "r", encoding="utf-8"
+            ) as file:
+                cache = json.load(file)
+            return {
+                "valid_rows": records_from_columns(cache["columns"], cache["table_name"]),
+                "invalid_rows": cache["invalid_rows"],
+            }
+
+        if result is None:
+            result = merge_chunks(iter_file(file_path, batch_size))
+
+        # Cache the valid rows column by column, which is more compact than per row
+        table_name = get_name_from_path(file_path)
+        cache = {
+            "table_name": table_name,
+            "columns": {
+                col: [row[col] for row in result["valid_rows"]]
+                for col in silver_columns(table_name)
+            },
+            "invalid_rows": result["invalid_rows"],
+        }
+        cache_path = self.cache_dir / f"{get_cache_name(file_path)}.json"
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with cache_path.open("w", encoding="utf-8") as file:
+            json.dump(cache, file)
+
+        entry = get_file_fingerprint(file_path)
+        entry.update(
+            {
+                "valid_rows": len(result["valid_rows"]),
+                "invalid_rows": len(result["invalid_rows"]),
+                "cache": str(cache_path),
+                "version": CACHE_VERSION,
+            }
+        )
+        self.entries[str(file_path)] = entry
+        return result
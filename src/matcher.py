@@ -0,0 +1,168 @@
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.constants import DEFAULT_CHUNK_SIZE
+
+
+class DrugMatcher:
+    """
+    Multi-pattern substring matcher built on an Aho-Corasick automaton.
+
+    All drug names are compiled into a single automaton so that every drug
+    occurring in a text is found in one pass over that text, instead of one
+    pass per drug. Matching is case-insensitive and has the same semantics
+    as ``name.lower() in text.lower()``.
+    """
+
+    def __init__(self, names):
+        """
+        Build the automaton from a list of names.
+
+        Args:
+            names (list): The names to search for. The position of each name
+                          in the list is the id returned by ``find``.
+        """
+        logging.debug("Building drug matcher for %d names", len(names))
+        self.size = len(names)
+        # Names that are empty match every text, as ``"" in text`` does
+        self._always = set()
+        self._goto = [{}]
+        self._output = [set()]
+
+        for index, name in enumerate(names):
+            pattern = name.lower()
+            if not pattern:
+                self._always.add(index)
+                continue
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._output.append(set())
+                node = next_node
+            self._output[node].add(index)
+
+        self._fail = [0] * len(self._goto)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        """
+        Compute failure links breadth-first and merge the output of each
+        node with the output of its failure node.
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] |= self._output[self._fail[child]]
+
+    def find(self, text):
+        """
+        Find every name occurring in a text.
+
+        Args:
+            text (str): The text to scan.
+
+        Returns:
+            set: The ids of the names found in the text.
+        """
+        found = set(self._always)
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found |= output[node]
+        return found
+
+
+# Matcher of the current worker process, built once by ``_init_worker``
+_worker_matcher = None
+
+
+def _init_worker(names, matcher=None):
+    """
+    Build the matcher of a worker process.
+
+    Args:
+        names (list): The names to compile into the matcher.
+        matcher (DrugMatcher, optional): A matcher already built from the names.
+    """
+    global _worker_matcher
+    _worker_matcher = matcher if matcher is not None else DrugMatcher(names)
+
+
+def _match_chunk(chunk):
+    """
+    Match a chunk of texts in a worker process.
+
+    Args:
+        chunk (tuple): The position of the first text and the list of texts.
+
+    Returns:
+        list: The position and the sorted ids of the names found, for each
+              text containing at least one name.
+    """
+    offset, texts = chunk
+    results = []
+    for position, text in enumerate(texts, offset):
+        found = _worker_matcher.find(text)
+        if found:
+            results.append((position, sorted(found)))
+    return results
+
+
+def match_texts(names, texts, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, matcher=None):
+    """
+    Find the names occurring in each text, optionally across a process pool.
+
+    Texts are sharded into chunks of ``chunk_size`` which are matched in
+    ``workers`` processes. Results are merged in the order of the texts, so
+    the output does not depend on the number of workers. The pool is only
+    used when there is more than one chunk to match.
+
+    Args:
+        names (list): The names to search for.
+        texts (list): The texts to scan.
+        workers (int, optional): The number of worker processes. Defaults to 1.
+        chunk_size (int, optional): The number of texts per chunk.
+        matcher (DrugMatcher, optional): A matcher already built from the names,
+                                         for example by a DrugDictionary.
+
+    Yields:
+        tuple: The position of a text and the sorted ids of the names found in
+               it, for each text containing at least one name, in text order.
+    """
+    if workers <= 1 or len(texts) <= chunk_size:
+        matcher = matcher if matcher is not None else DrugMatcher(names)
+        for position, text in enumerate(texts):
+            found = matcher.find(text)
+            if found:
+                yield position, sorted(found)
+        return
+
+    logging.info(
+        f"Matching {len(texts)} texts in chunks of {chunk_size} across {workers} workers"
+    )
+    chunks = (
+        (offset, texts[offset : offset + chunk_size])
+        for offset in range(0, len(texts), chunk_size)
+    )
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(names, matcher)
+    ) as executor:
+        for results in executor.map(_match_chunk, chunks):
+            yield from results
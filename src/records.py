@@ -0,0 +1,158 @@
+import sys
+
+from src.utils.dates import parse_date
+
+class Record:
+    """
+    Compact, typed row of a data table.
+
+    Records store their values in ``__slots__`` instead of a per-row
+    dictionary. They support read access by column name, like the dictionaries
+    produced by the readers, so they can be used wherever rows are read.
+    """
+
+    __slots__ = ()
+
+    # Columns whose values repeat across rows and are interned
+    INTERNED = ()
+
+    # Attributes computed at ingest, which are not columns of the record but
+    # are stored with them in the silver layer, with their type
+    DERIVED = {}
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            if field in self.INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            object.__setattr__(self, field, value)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.values() == other.values()
+        return NotImplemented
+
+    def values(self):
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The values of the record by column name.
+        """
+        return dict(zip(self.__slots__, self.values()))
+
+    def __repr__(self):
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Drug(Record):
+    """Row of the drugs table"""
+
+    __slots__ = ("atccode", "drug")
+
+
+class Synonym(Record):
+    """Row of the synonyms table, an alternate or brand name of a drug"""
+
+    __slots__ = ("atccode", "synonym")
+
+
+class Publication(Record):
+    """
+    Row of a publication table.
+
+    The date is parsed into a day number when the record is built, in the
+    ``day`` attribute, which is not one of the columns of the record. Records
+    read back from the silver layer are given the day number stored there.
+    """
+
+    __slots__ = ("day",)
+    DERIVED = {"day": int}
+
+    def __init__(self, *values, day=None):
+        super().__init__(*values)
+        object.__setattr__(self, "day", parse_date(self.date) if day is None else day)
+
+
+class Pubmed(Publication):
+    """Row of the pubmed table"""
+
+    __slots__ = ("id", "title", "date", "journal")
+    INTERNED = ("date", "journal")
+
+
+class ClinicalTrial(Publication):
+    """Row of the clinical_trials table"""
+
+    __slots__ = ("id", "scientific_title", "date", "journal")
+    INTERNED = ("date", "journal")
+
+
+RECORD_TYPES = {
+    "drugs": Drug,
+    "synonyms": Synonym,
+    "pubmed": Pubmed,
+    "clinical_trials": ClinicalTrial,
+}
+
+
+def to_records(rows, table_name):
+    """
+    Convert rows given as dictionaries to the records of a table.
+
+    Args:
+        rows (iterable): The rows of the table, as dictionaries, with the
+                         attributes derived from them at ingest, if known.
+        table_name (str): The name of the table.
+
+    Returns:
+        list: The records of the table.
+    """
+    record_type = RECORD_TYPES[table_name]
+    fields = record_type.__slots__
+    return [
+        record_type(
+            *(row.get(field) for field in fields),
+            **{field: row[field] for field in record_type.DERIVED if field in row},
+        )
+        for row in rows
+    ]
+
+
+def records_from_columns(columns, table_name):
+    """
+    Build the records of a table from its columns.
+
+    Args:
+        columns (dict): The values of each column of the table, and of the
+                        attributes derived from them at ingest, if known.
+        table_name (str): The name of the table.
+
+    Returns:
+        list: The records of the table.
+    """
+    record_type = RECORD_TYPES[table_name]
+    fields = record_type.__slots__
+    derived = [field for field in record_type.DERIVED if field in columns]
+    if not derived:
+        return [record_type(*values) for values in zip(*(columns[field] for field in fields))]
+    return [
+        record_type(*values[: len(fields)], **dict(zip(derived, values[len(fields) :])))
+        for values in zip(*(columns[field] for field in [*fields, *derived]))
+    ]
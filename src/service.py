@@ -0,0 +1,280 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from src.config.config import Config
+from src.dictionary import load_or_build_dictionary
+from src.discovery import discover_inputs, iter_input_paths
+from src.manifest import Manifest
+from src.transform import find_drug_mentions
+from src.utils.constants import DEFAULT_BATCH_SIZE, PUBLICATION_TABLE_NAMES
+from src.utils.utils import process_publication
+
+
+def inputs_fingerprint(inputs):
+    """
+    Args:
+        inputs (list): The InputFile of each file, as returned by discover_inputs.
+
+    Returns:
+        tuple: The path, size and mtime of each file, which change when a file does.
+    """
+    return tuple(sorted((str(item.path), item.size, item.mtime_ns) for item in inputs))
+
+
+class MentionService:
+    """
+    Drug mention queries answered from publications kept in memory.
+
+    The publications, their title indexes and the mentions of the known
+    drugs are loaded once. Ad-hoc drug names are then looked up in the warm
+    title indexes. The loaded state is replaced as a whole when the bronze
+    files change, so queries never see a half reloaded state.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config (Config): The pipeline configuration.
+        """
+        self.config = config
+        self.processing_config = config.get("processing", {})
+        self.match_mode = self.processing_config.get("match_mode", "substring")
+        self.bronze_dir = Path(config.get("paths")["bronze"])
+        self.silver_dir = Path(config.get("paths")["silver"])
+        self.manifest = Manifest(self.silver_dir / "manifest.json")
+        self.state = None
+        self._reload_lock = threading.Lock()
+
+    def load(self):
+        """
+        Load the publications and the mentions of the known drugs.
+
+        Unchanged files are read back from the manifest cache and the silver
+        layer, so reloading after a change only parses the changed files.
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            inputs = discover_inputs(self.bronze_dir, self.config.get("inputs"))
+            batch_size = self.processing_config.get("batch_size", DEFAULT_BATCH_SIZE)
+
+            publications = process_publication(
+                iter_input_paths(inputs, PUBLICATION_TABLE_NAMES),
+                batch_size,
+                self.manifest,
+                silver_format=self.processing_config.get("silver_format", "arrow"),
+                workers=self.processing_config.get("workers", 1),
+                silver_dir=self.silver_dir,
+            )
+            drug_files = list(iter_input_paths(inputs, ["drugs"]))
+            synonym_files = sorted(iter_input_paths(inputs, ["synonyms"]))
+
+            def read_rows(file_paths):
+                rows = []
+                for file_path in file_paths:
+                    rows.extend(self.manifest.process_file(file_path, batch_size)["valid_rows"])
+                return rows
+
+            dictionary = load_or_build_dictionary(
+                lambda: read_rows(drug_files),
+                drug_files + synonym_files,
+                self.silver_dir / "drugs.dictionary.pickle",
+                lambda: read_rows(synonym_files),
+            )
+            self.manifest.save()
+
+            drug_rows = dictionary.rows
+            mentions = find_drug_mentions(
+                dictionary.to_drugs(),
+                publications,
+                persist_lookups=False,
+                match_mode=self.match_mode,
+            )
+            self.state = {
+                "fingerprint": inputs_fingerprint(inputs),
+                "loaded_at": time.time(),
+                "publications": publications,
+                "drugs": {drug["atccode"]: drug["drug"] for drug in drug_rows},
+                "mentions": {mention["drug"]: mention for mention in mentions},
+            }
+            logging.info(
+                f"Mention service loaded {len(drug_rows)} drugs and "
+                f"{sum(len(publication['rows']) for publication in publications)} "
+                f"publications in {time.perf_counter() - start:.3f}s"
+            )
+
+    def reload_if_changed(self):
+        """
+        Reload the state if the bronze files changed since it was loaded.
+
+        Returns:
+            bool: True if the state was reloaded.
+        """
+        inputs = discover_inputs(self.bronze_dir, self.config.get("inputs"))
+        if self.state is not None and inputs_fingerprint(inputs) == self.state["fingerprint"]:
+            return False
+        logging.info("Bronze files changed, reloading the mention service")
+        self.load()
+        return True
+
+    def watch(self, interval, stop_event):
+        """
+        Poll the bronze files and reload on change, until stopped.
+
+        Args:
+            interval (float): The number of seconds between checks.
+            stop_event (threading.Event): Set to stop watching.
+        """
+        while not stop_event.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # Keep serving the previous state
+                logging.error(f"Reloading the mention service failed: {str(e)}")
+
+    def query_code(self, atccode):
+        """
+        Args:
+            atccode (str): The ATC code of a known drug.
+
+        Returns:
+            dict: The mentions of the drug, in the gold format, or None if not mentioned.
+        """
+        return self.state["mentions"].get(atccode)
+
+    def query_name(self, name):
+        """
+        Look up the mentions of any drug name in the warm publications.
+
+        Args:
+            name (str): The drug name, which does not need to be in the drugs file.
+
+        Returns:
+            dict: The mentions of the name, in the gold format with the name as
+                  'drug', or None if not mentioned.
+        """
+        state = self.state
+        drugs = {"rows": [{"atccode": name, "drug": name}], "search_column": "drug"}
+        mentions = find_drug_mentions(
+            drugs, state["publications"], persist_lookups=False, match_mode=self.match_mode
+        )
+        return mentions[0] if mentions else None
+
+    def health(self):
+        """
+        Returns:
+            dict: The status of the service and the size of the loaded state.
+        """
+        state = self.state
+        return {
+            "status": "ok",
+            "loaded_at": state["loaded_at"],
+            "drugs": len(state["drugs"]),
+            "publications": sum(len(publication["rows"]) for publication in state["publications"]),
+        }
+
+
+def make_handler(service):
+    """
+    Create the HTTP request handler of a mention service.
+
+    Routes:
+        GET /health: The status of the service.
+        GET /mentions?atccode=A04AD: The mentions of a drug of the drugs file.
+        GET /mentions?name=aspirin: The mentions of any drug name.
+
+    Args:
+        service (MentionService): The loaded service.
+
+    Returns:
+        type: The request handler class.
+    """
+
+    class MentionRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+            if url.path == "/health":
+                self._send(200, service.health())
+                return
+            if url.path != "/mentions":
+                self._send(404, {"error": f"Unknown path: {url.path}"})
+                return
+
+            start = time.perf_counter()
+            if params.get("atccode"):
+                query = {"atccode": params["atccode"]}
+                mentions = service.query_code(params["atccode"])
+            elif params.get("name"):
+                query = {"name": params["name"]}
+                mentions = service.query_name(params["name"])
+            else:
+                self._send(400, {"error": "Expecting an 'atccode' or 'name' parameter"})
+                return
+            self._send(
+                200,
+                {
+                    "query": query,
+                    "mentions": mentions,
+                    "elapsed_ms": (time.perf_counter() - start) * 1000,
+                },
+            )
+
+        def log_message(self, format, *args):
+            logging.debug("%s - %s", self.address_string(), format % args)
+
+    return MentionRequestHandler
+
+
+def serve(config=None):
+    """
+    Load the mention service and serve it over HTTP until interrupted.
+
+    Args:
+        config (Config, optional): The configuration. Defaults to the pipeline configuration.
+    """
+    config = config or Config()
+    service_config = config.get("service", {}) or {}
+
+    service = MentionService(config)
+    service.load()
+
+    stop_event = threading.Event()
+    watcher = threading.Thread(
+        target=service.watch,
+        args=(service_config.get("reload_interval", 5), stop_event),
+        daemon=True,
+    )
+    watcher.start()
+
+    host = service_config.get("host", "127.0.0.1")
+    port = service_config.get("port", 8080)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    logging.info(f"Mention service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Stopping the mention service")
+    finally:
+        stop_event.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    serve()
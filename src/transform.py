@@ -1,87 +1,165 @@
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from src.dictionary import DrugDictionary
+from src.matcher import match_texts
+from src.utils.constants import DEFAULT_CHUNK_SIZE
+from src.utils.log import ProgressLogger
+from src.utils.text import MATCH_MODES, normalize_text, normalized_titles
 
 
-def find_drug_mentions(drugs, publications):
+def find_drug_mentions(
+    drugs,
+    publications,
+    workers=1,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    stream=False,
+    persist_lookups=True,
+    match_mode="substring",
+):
     """
     Finds and returns mentions of drugs in a list of publications.
 
     Args:
         drugs (dict): A dictionary containing information about the drugs.
                       It should have the following structure:
-                      - 'rows': A list of dictionaries, where each dictionary represents a drug
+                      - 'rows': A list of records (or dictionaries), where each one represents a drug
                                 and contains at least the drug name and its ATC code.
                       - 'search_column': The name of the column in the 'drugs' dictionaries
                                         that contains the drug name.
+                      - 'dictionary' (optional): A DrugDictionary of the rows, whose names
+                                                 and matchers are compiled ahead of time.
+                      - 'synonyms' (optional): The rows of the synonyms table, compiled
+                                               into a DrugDictionary when there is none.
         publications (dict): A dictionary containing information about the publications.
                              It should have the following structure:
-                             - 'rows': A list of dictionaries, where each dictionary represents a publication
-                                       and contains at least the publication ID, date, and title.
+                             - 'rows': A list of records (or dictionaries), where each one represents a
+                                       publication and contains at least the publication ID, date, and title.
                              - 'search_column': The name of the column in the 'publications' dictionaries
                                                that contains the publication title.
+                             - 'index' (optional): A TitleIndex over the titles, used instead of
+                                                   scanning every title.
+        workers (int, optional): The number of processes matching the titles. Defaults to 1.
+        chunk_size (int, optional): The number of titles matched per worker task.
+        stream (bool, optional): Return an iterator building the mentions of each drug only
+                                 when it is consumed, instead of a list. Defaults to False.
+        persist_lookups (bool, optional): Reuse and persist the title index lookups, see
+                                          TitleIndex.lookup. Defaults to True.
+        match_mode (str, optional): 'substring' to find the names anywhere in the titles,
+                                    as ``name.lower() in title.lower()``, or 'word' to find
+                                    them on token boundaries of the titles, after Unicode
+                                    normalization (see normalize_text). The normalized titles
+                                    are cached in the publications. Defaults to 'substring'.
 
     Returns:
         list: A list of dictionaries, where each dictionary represents a drug and its mentions
               in the publications. The dictionary structure is as follows:
               - 'drug': The ATC code of the drug.
               - 'pubmed': A list of dictionaries, where each dictionary represents a PubMed mention
-                          and contains the publication ID and date.
+                          and contains the publication ID, date, and day number of
+                          the date (see parse_date), None if unknown.
               - 'journal': A list of dictionaries, where each dictionary represents a journal mention
                            and contains the journal name and date.
+
+    Raises:
+        ValueError: If the match mode is unknown.
     """
-    logging.info("Finding drug mentions in publications")
+    if match_mode not in MATCH_MODES:
+        raise ValueError(f"Unknown match mode: {match_mode}")
+    logging.info(f"Finding drug mentions in publications ({match_mode} match mode)")
+
+    dictionary = drugs.get("dictionary")
+    if dictionary is None and drugs.get("synonyms"):
+        dictionary = DrugDictionary(
+            drugs["rows"], drugs["search_column"], synonyms=drugs["synonyms"]
+        )
+    if dictionary is not None:
+        names = dictionary.names
+    else:
+        search_column = drugs["search_column"]
+        names = [drug[search_column] for drug in drugs["rows"]]
+
+    if match_mode == "word":
+        if dictionary is not None:
+            word_patterns, word_matcher = dictionary.word_patterns, dictionary.word_matcher
+        else:
+            word_patterns, word_matcher = [normalize_text(name) for name in names], None
+
+    # Collect the ids of the matching rows per drug, from the normalized titles
+    # in word mode, from the title index when the publications have one,
+    # otherwise by scanning each title once
+    matches = []
+    for publication in publications:
+        column = publication["search_column"]
+        rows = publication["rows"]
+        if match_mode == "word":
+            # One pass of every name over each normalized title, normalized once per table
+            table_matches = [[] for _ in names]
+            titles = normalized_titles(publication)
+            for row_id, found in match_texts(
+                word_patterns, titles, workers, chunk_size, word_matcher
+            ):
+                for index in found:
+                    table_matches[index].append(row_id)
+        elif publication.get("index") is not None:
+            table_matches = publication["index"].lookup(
+                names, rows, column, workers, chunk_size, persist_lookups, dictionary
+            )
+        else:
+            table_matches = [[] for _ in names]
+            titles = [pub[column] for pub in rows]
+            matcher = dictionary.matcher if dictionary is not None else None
+            for row_id, found in match_texts(names, titles, workers, chunk_size, matcher):
+                for index in found:
+                    table_matches[index].append(row_id)
+        if dictionary is not None:
+            # Mentions of the synonyms of a drug are mentions of the drug
+            table_matches = dictionary.group_matches(table_matches)
+        matches.append(table_matches)
+
+    # Mention entries of each publication row, built once and shared by every
+    # drug mentioned in that row
+    entries = [{} for _ in publications]
 
-    def extract_mentions(drug):
+    def get_entries(table, row_id):
+        cached = entries[table].get(row_id)
+        if cached is None:
+            pub = publications[table]["rows"][row_id]
+            cached = (
+                {"id": pub["id"], "date": pub["date"], "day": pub.get("day")},
+                {"name": pub["journal"], "date": pub["date"]},
+            )
+            entries[table][row_id] = cached
+        return cached
+
+    def extract_mentions(index, drug):
         """
-        Extracts mentions of a specific drug in the publications.
+        Builds the mentions of a specific drug from the rows matched in the publications.
 
         Args:
-            drug (dict): A dictionary representing a drug, containing at least the drug name
-                         and its ATC code.
+            index (int): The position of the drug in the drug rows.
+            drug (Drug): The drug record, containing at least the drug name and its ATC code.
 
         Returns:
             dict: A dictionary containing the drug's ATC code, PubMed mentions, and journal mentions,
                   or None if no mentions are found.
         """
-        logging.info(f"Extracting mentions for drug: {drug[drugs['search_column']]}")
-
-        # Extract the drug name from the drug dictionary
-        drug_name = drug[drugs["search_column"]].lower()
-
-        # Filter publications that contain the drug name in the title
         mentions = {"drug": drug["atccode"]}
-        for publication in publications:
-            search_column = publication["search_column"]
-            filtered_publications = list(
-                filter(
-                    lambda pub: drug_name in pub[search_column].lower(),
-                    publication["rows"],
-                )
-            )
+        for table, (publication, table_matches) in enumerate(zip(publications, matches)):
+            row_ids = table_matches[index]
 
-            if filtered_publications:
+            if row_ids:
                 # Format the results for each publication type
-                mentions[publication["table_name"]] = list(
-                    map(
-                        lambda pub: {"id": pub["id"], "date": pub["date"]},
-                        filtered_publications,
-                    )
-                )
-                mentions["journal"] = list(
-                    map(
-                        lambda jour: {"name": jour["journal"], "date": jour["date"]},
-                        filtered_publications,
-                    )
-                )
+                table_entries = [get_entries(table, row_id) for row_id in row_ids]
+                mentions[publication["table_name"]] = [entry[0] for entry in table_entries]
+                mentions["journal"] = [entry[1] for entry in table_entries]
 
         # Create the final structure for the drug if there are any mentions
         return mentions if mentions.get("journal") else None
 
-    # Apply the mention extraction for each drug
-    mentions = map(extract_mentions, drugs["rows"])
+    # Apply the mention extraction for each drug, logging progress periodically
+    drug_rows = drugs["rows"]
+    progress = ProgressLogger("Extracted mentions for drugs", every=1000, total=len(drug_rows))
+    mentions = progress.track(map(extract_mentions, range(len(drug_rows)), drug_rows))
     # Filter out any None values from the mentions list
-    return list(filter(lambda mention: mention, mentions))
+    mentions = filter(lambda mention: mention, mentions)
+    return mentions if stream else list(mentions)
@@ -1,12 +1,30 @@
 # Exemple de SCHEMA où chaque colonne a un nom et un type attendu
-from typing import List
+from typing import Dict, List
 
 DATA_TABLE_NAMES: List[str] = ["drugs", "clinical_trials", "pubmed"]
 
 PUBLICATION_TABLE_NAMES: List[str] = ["clinical_trials", "pubmed"]
 
+# Tables read when their files exist, such as the alternate names of the drugs
+OPTIONAL_TABLE_NAMES: List[str] = ["synonyms"]
+
+# Number of rows read and validated at a time, see processing.batch_size
+DEFAULT_BATCH_SIZE: int = 1000
+
+# Number of titles matched per worker task, see processing.chunk_size
+DEFAULT_CHUNK_SIZE: int = 10000
+
+# Glob patterns of the bronze files of each table, see the 'inputs' configuration
+DEFAULT_INPUT_PATTERNS: Dict[str, List[str]] = {
+    "drugs": ["drugs*.csv", "drugs*.json"],
+    "pubmed": ["pubmed*.csv", "pubmed*.json"],
+    "clinical_trials": ["clinical_trials*.csv", "clinical_trials*.json"],
+    "synonyms": ["synonyms*.csv", "synonyms*.json"],
+}
+
 SCHEMA = {
     "drugs": {"atccode": str, "drug": str},
+    "synonyms": {"atccode": str, "synonym": str},
     "clinical_trials": {
         "id": str,
         "scientific_title": str,
@@ -16,6 +34,7 @@ SCHEMA = {
     "pubmed": {"id": int, "title": str, "date": str, "journal": str},
     "search_column": {
         "drugs": "drug",
+        "synonyms": "synonym",
         "clinical_trials": "scientific_title",
         "pubmed": "title",
     },
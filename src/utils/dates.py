@@ -0,0 +1,100 @@
+import datetime
+import logging
+import re
+
+MONTHS = {
+    month: number
+    for number, month in enumerate(
+        [
+            "january", "february", "march", "april", "may", "june", "july",
+            "august", "september", "october", "november", "december",
+        ],
+        1,
+    )
+}
+
+# Date formats found in the publications, as (pattern, (year, month, day) groups)
+DATE_PATTERNS = [
+    # 2020-01-01
+    (re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$"), (1, 2, 3)),
+    # 25/05/2020, day first
+    (re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$"), (3, 2, 1)),
+    # 1 January 2020
+    (re.compile(r"^(\d{1,2}) ([A-Za-z]+) (\d{4})$"), (3, 2, 1)),
+]
+
+# Day number of each distinct date string already parsed, None if invalid
+_day_cache = {}
+
+
+def _parse(text):
+    for pattern, (year, month, day) in DATE_PATTERNS:
+        match = pattern.match(text.strip())
+        if match:
+            month_value = match[month]
+            if not month_value.isdigit():
+                month_value = MONTHS.get(month_value.lower())
+            try:
+                return datetime.date(
+                    int(match[year]), int(month_value), int(match[day])
+                ).toordinal()
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def parse_date(text):
+    """
+    Parse a publication date into a day number.
+
+    Each distinct date string is parsed once; publications share a handful
+    of dates, so later calls are a dictionary lookup.
+
+    Args:
+        text (str): The date as found in the publications.
+
+    Returns:
+        int: The proleptic Gregorian ordinal of the date (see datetime.date.toordinal),
+             or None if the date cannot be parsed.
+    """
+    try:
+        return _day_cache[text]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable values are not dates
+        return None
+
+    day = _parse(text) if isinstance(text, str) else None
+    if day is None and text:
+        logging.debug(f"Cannot parse date: {text!r}")
+    _day_cache[text] = day
+    return day
+
+
+def to_day(value):
+    """
+    Convert a date given in any supported form to a day number.
+
+    Args:
+        value: A day number, a datetime.date, or a date string.
+
+    Returns:
+        int: The day number, or None if the value is not a valid date.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime.date):
+        return value.toordinal()
+    return parse_date(value)
+
+
+def day_to_date(day):
+    """
+    Args:
+        day (int): A day number, as returned by parse_date.
+
+    Returns:
+        datetime.date: The corresponding date.
+    """
+    return datetime.date.fromordinal(day)
@@ -1,70 +1,273 @@
+import io
+import re
 import json
+import codecs
+import hashlib
+import tempfile
 import time
 import csv
-import re
 from pathlib import Path
 import charset_normalizer
-from typing import List
+from typing import Iterator, List
 import logging
 import os
 from datetime import datetime
-
-
-from src.utils.constants import SCHEMA, DATA_TABLE_NAMES
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+from src.utils.constants import SCHEMA, DATA_TABLE_NAMES, DEFAULT_BATCH_SIZE, OPTIONAL_TABLE_NAMES
+from src.utils.validation import validate_batch
+from src.utils.lenient_json import iter_json_array
+from src.records import records_from_columns
+from src.utils.log import ProgressLogger
+
+# Number of bytes used to detect the encoding of a file
+ENCODING_SAMPLE_SIZE = 10000
+
+# Byte order marks and their encodings, UTF-32 first as it extends UTF-16 LE's mark
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Layouts supported by write_json_items
+JSON_OUTPUT_FORMATS = ("json", "compact", "ndjson")
+
+# Table name of a file, as a whole word of its name
+TABLE_NAME_PATTERN = re.compile(
+    r"(?<![a-z0-9])("
+    + "|".join(sorted(DATA_TABLE_NAMES + OPTIONAL_TABLE_NAMES, key=len, reverse=True))
+    + r")(?![a-z0-9])"
 )
 
+# Detected encodings keyed by (path, mtime)
+_encoding_cache = {}
+
 
-def combine_files_by_table_name(file_paths):
+def combine_files_by_table_name(
+    file_paths, batch_size=DEFAULT_BATCH_SIZE, manifest=None, workers=1
+):
     """
     Takes a list of file paths, guesses the table name for each file,
     and combines files with the same table name.
 
+    With several workers, the files to parse are read, decoded and validated
+    concurrently in a pool of processes, so ingestion takes about as long as
+    the largest file. Paths are consumed lazily and each file is submitted to
+    the pool as soon as it is received, so passing the largest files first
+    keeps them from straggling. Results are merged per table in path order,
+    whatever the order files are received or finished in.
+
     Args:
-        file_paths (list): A list of file paths.
+        file_paths (iterable): The file paths.
+        batch_size (int, optional): The number of rows read and validated at a time.
+        manifest (Manifest, optional): The manifest used to skip unchanged files.
+        workers (int, optional): The maximum number of files parsed at once. Defaults to 1.
 
     Returns:
         dict: A dictionary where keys are table names and values are lists of
-              combined data from files belonging to that table.
+              combined data from files belonging to that table, along with the
+              number of valid rows read from each file under 'files'.
     """
     logging.debug("Combining files by table name")
+    table_names = {}
+    futures = {}
+    with ExitStack() as stack:
+        executor = None
+        # The first file to parse is kept for this process unless others follow
+        deferred = None
+        for file_path in file_paths:
+            table_name = get_name_from_path(file_path)
+            if not table_name:
+                continue
+            table_names[file_path] = table_name
+            if workers <= 1 or (manifest is not None and manifest.is_unchanged(file_path)):
+                continue
+            if executor is None:
+                if deferred is None:
+                    deferred = file_path
+                    continue
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                futures[executor.submit(process_file, deferred, batch_size)] = deferred
+            futures[executor.submit(process_file, file_path, batch_size)] = file_path
+        results = {futures[future]: future.result() for future in as_completed(futures)}
+
     combined_data = {}
-    for file_path in file_paths:
-        table_name = get_name_from_path(file_path)
-        if table_name:
-            if table_name not in combined_data:
-                combined_data[table_name] = {"valid_rows": [], "invalid_rows": []}
-            processed_file = process_file(file_path)
-            combined_data[table_name]["valid_rows"].extend(processed_file["valid_rows"])
+    for file_path in sorted(table_names, key=str):
+        table_name = table_names[file_path]
+        if table_name not in combined_data:
+            combined_data[table_name] = {
+                "valid_rows": [],
+                "invalid_rows": [],
+                "files": [],
+            }
+        result = results.pop(file_path, None)
+        if manifest is not None:
+            chunks = [manifest.process_file(file_path, batch_size, result)]
+        elif result is not None:
+            chunks = [result]
+        else:
+            chunks = iter_file(file_path, batch_size)
+        count = 0
+        for chunk in chunks:
+            combined_data[table_name]["valid_rows"].extend(chunk["valid_rows"])
             combined_data[table_name]["invalid_rows"].extend(
-                processed_file["invalid_rows"]
+                chunk["invalid_rows"]
             )
+            count += len(chunk["valid_rows"])
+        combined_data[table_name]["files"].append((file_path, count))
     return combined_data
 
 
+def group_files_by_table_name(file_paths):
+    """
+    Group file paths by the table name guessed from each path.
+
+    Args:
+        file_paths (list): A list of file paths.
+
+    Returns:
+        dict: The paths of each table, in their original order. Files whose
+              table cannot be guessed are left out.
+    """
+    groups = {}
+    for file_path in file_paths:
+        table_name = get_name_from_path(file_path)
+        if table_name:
+            groups.setdefault(table_name, []).append(file_path)
+    return groups
+
+
 def get_name_from_path(file_path):
     """
     Guess the table name from the file path.
 
+    The table name must appear in the file name as a whole word, so
+    'pubmed_2020-01-01.csv' belongs to pubmed but 'notpubmed.csv' does not.
+    Longer table names are tried first.
+
     Args:
         file_path (Path): The path to the file.
 
     Returns:
         str: The guessed table name, or None if not found.
     """
-    logging.debug(f"Guessing table name from file path: {file_path}")
+    logging.debug("Guessing table name from file path: %s", file_path)
     guessed_table_name = None
-    for table_name in DATA_TABLE_NAMES:
-        if table_name in file_path.name:
-            guessed_table_name = table_name
-            break
-    logging.debug(f"Guessed table name: {guessed_table_name}")
+    match = TABLE_NAME_PATTERN.search(Path(file_path).name.lower())
+    if match:
+        guessed_table_name = match[1]
+    logging.debug("Guessed table name: %s", guessed_table_name)
     return guessed_table_name
 
 
+def validate_rows(rows, table_name, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Validate rows against the schema of a table, in chunks.
+
+    Each chunk is validated column by column with ``validate_batch``, and
+    valid rows are returned as records of the table, with their values
+    converted to the schema types.
+
+    Args:
+        rows (iterable): The rows to validate.
+        table_name (str): The name of the table whose schema the rows must follow.
+        batch_size (int, optional): The maximum number of rows per chunk.
+
+    Yields:
+        dict: A chunk of at most ``batch_size`` rows.
+             - 'valid_rows': A list of records, where each record represents a valid row.
+             - 'invalid_rows': A list of dictionaries, where each dictionary represents an invalid row
+                               and includes the error message.
+    """
+    batch = []
+    progress = ProgressLogger(f"Validated rows of {table_name}", every=100000, level=logging.DEBUG)
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield build_chunk(batch, table_name)
+            progress.update(len(batch))
+            batch = []
+
+    if batch:
+        yield build_chunk(batch, table_name)
+        progress.update(len(batch))
+    progress.done()
+
+
+def build_chunk(batch, table_name):
+    """
+    Validate a batch of rows and split it into valid and invalid rows.
+
+    Args:
+        batch (list): The rows to validate.
+        table_name (str): The name of the table whose schema the rows must follow.
+
+    Returns:
+        dict: The valid rows, as typed records, and the invalid rows with their error.
+    """
+    result = validate_batch(batch, SCHEMA[table_name])
+    valid_rows = [
+        record
+        for record, is_valid in zip(
+            records_from_columns(result["columns"], table_name), result["valid"]
+        )
+        if is_valid
+    ]
+    invalid_rows = [
+        {"row": batch[i], "error": error} for i, error in sorted(result["errors"].items())
+    ]
+    return {"valid_rows": valid_rows, "invalid_rows": invalid_rows}
+
+
+def merge_chunks(chunks):
+    """
+    Merge chunks of validated rows into a single result.
+
+    Args:
+        chunks (iterable): The chunks yielded by ``validate_rows``.
+
+    Returns:
+        dict: A dictionary containing lists of all valid and invalid rows.
+    """
+    result = {"valid_rows": [], "invalid_rows": []}
+    for chunk in chunks:
+        result["valid_rows"].extend(chunk["valid_rows"])
+        result["invalid_rows"].extend(chunk["invalid_rows"])
+    return result
+
+
+def iter_rows(file_path, encoding=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream rows from a CSV file and validate them against the schema, in chunks.
+
+    Args:
+        file_path (Path): The path to the CSV file.
+        encoding (str, optional): The encoding of the CSV file. Detected if not given.
+        batch_size (int, optional): The maximum number of rows per chunk.
+
+    Yields:
+        dict: A chunk of valid and invalid rows, as yielded by ``validate_rows``.
+    """
+    logging.info(f"Reading rows from CSV file: {file_path}")
+
+    time_st = time.time()
+    table_name = get_name_from_path(file_path)
+
+    with open_text(file_path, encoding) as (filename, _):
+        reader = csv.DictReader(filename)
+        yield from validate_rows(reader, table_name, batch_size)
+
+    logging.debug(
+        "Finished reading rows from CSV file: %s in %.3f seconds", file_path, time.time() - time_st
+    )
+
+
 def read_rows(file_path, encoding):
     """
     Read rows from a CSV file, validate them against the schema, and separate valid and invalid rows.
@@ -75,60 +278,61 @@ def read_rows(file_path, encoding):
 
     Returns:
         dict: A dictionary containing lists of valid and invalid rows.
-             - 'valid_rows': A list of dictionaries, where each dictionary represents a valid row.
+             - 'valid_rows': A list of records, where each record represents a valid row.
              - 'invalid_rows': A list of dictionaries, where each dictionary represents an invalid row
                                and includes the error message.
     """
-    logging.info(f"Reading rows from CSV file: {file_path}")
+    return merge_chunks(iter_rows(file_path, encoding))
 
-    time_st = time.time()
-    valid_rows = []
-    invalid_rows = []
-
-    table_name = get_name_from_path(file_path)
 
-    with file_path.open(newline="", encoding=encoding) as filename:
-        reader = csv.DictReader(filename)
+def iter_json_rows(file_path, encoding=None):
+    """
+    Stream the elements of a JSON array file, repairing trailing commas on the fly.
 
-        for row in reader:
-            is_valid, error = check_row(SCHEMA[table_name], row)
+    Args:
+        file_path (Path): The path to the JSON file.
+        encoding (str, optional): The encoding of the JSON file. Detected if not given.
 
-            if is_valid:
-                valid_rows.append(row)
-            else:
-                invalid_rows.append({"row": row, "error": error})
+    Yields:
+        dict: The elements of the array.
+    """
+    repairs = []
+    with open_text(file_path, encoding) as (filename, encoding):
+        try:
+            yield from iter_json_array(filename, encoding=encoding, repairs=repairs)
+        except json.JSONDecodeError as e:
+            logging.error(f"Error decoding JSON: {e}")
+            raise  # Re-raise the exception after logging
 
-    logging.debug(
-        f"Finished reading rows from CSV file: {file_path} in {time.time() - time_st} seconds"
-    )
-    return {"valid_rows": valid_rows, "invalid_rows": invalid_rows}
+    if repairs:
+        offsets = ", ".join(str(repair["offset"]) for repair in repairs)
+        logging.warning(
+            f"Repaired {len(repairs)} JSON defects in {file_path} at byte offsets: {offsets}"
+        )
 
 
-def json_handler(file_path):
+def iter_json(file_path, encoding=None, batch_size=DEFAULT_BATCH_SIZE):
     """
-    Handles JSON file reading and attempts to correct common JSON errors.
+    Stream entries from a JSON file and validate them against the schema, in chunks.
 
     Args:
         file_path (Path): The path to the JSON file.
-        encoding (str): The encoding of the JSON file.
+        encoding (str, optional): The encoding of the JSON file. Detected if not given.
+        batch_size (int, optional): The maximum number of entries per chunk.
 
-    Returns:
-        dict: The loaded JSON data as a dictionary.
+    Yields:
+        dict: A chunk of valid and invalid entries, as yielded by ``validate_rows``.
     """
     logging.info(f"Reading JSON file: {file_path}")
-    rows = []
-    with file_path.open("r", encoding="utf-8") as filename:
-        content = filename.read()
-        # Try to fix common JSON error of trailing commas
-        json_string = re.sub(r",\s*(\}|\])", r"\1", content)
 
-    try:
-        output = json.loads(json_string)
-    except json.JSONDecodeError as e:
-        logging.error(f"Error decoding JSON: {e}")
-        raise  # Re-raise the exception after logging
+    time_st = time.time()
+    table_name = get_name_from_path(file_path)
 
-    return output
+    yield from validate_rows(iter_json_rows(file_path, encoding), table_name, batch_size)
+
+    logging.debug(
+        "Finished reading JSON file: %s in %.3f seconds", file_path, time.time() - time_st
+    )
 
 
 def read_json(file_path, encoding):
@@ -141,37 +345,11 @@ def read_json(file_path, encoding):
 
     Returns:
         dict: A dictionary containing lists of valid and invalid entries.
-             - 'valid_rows': A list of dictionaries, where each dictionary represents a valid entry.
+             - 'valid_rows': A list of records, where each record represents a valid entry.
              - 'invalid_rows': A list of dictionaries, where each dictionary represents an invalid entry
                                and includes the error message.
     """
-    logging.info(f"Reading JSON file: {file_path}")
-
-    time_st = time.time()
-    valid_rows = []
-    invalid_rows = []
-
-    table_name = get_name_from_path(file_path)
-
-    with file_path.open(newline="", encoding=encoding) as filename:
-        try:
-            output = json.load(filename)
-        except json.JSONDecodeError as e:
-            logging.warning(f"Encountered JSONDecodeError: {e}. Attempting to fix...")
-            output = json_handler(file_path)
-
-        for row in output:
-            is_valid, error = check_row(SCHEMA[table_name], row)
-
-            if is_valid:
-                valid_rows.append(row)
-            else:
-                invalid_rows.append({"row": row, "error": error})
-
-        logging.debug(
-            f"Finished reading JSON file: {file_path} in {time.time() - time_st} seconds"
-        )
-        return {"valid_rows": valid_rows, "invalid_rows": invalid_rows}
+    return merge_chunks(iter_json(file_path, encoding))
 
 
 def check_row(schema, row):
@@ -188,25 +366,63 @@ def check_row(schema, row):
                - is_valid (bool): True if the row is valid according to the schema, False otherwise.
                - error (str): An error message if the row is invalid, otherwise None.
     """
-    if len(row) != len(schema):
-        return (
-            False,
-            f"Incorrect number of columns. Expected {len(schema)}, found {len(row)}.",
-        )
+    result = validate_batch([row], schema)
+    if result["valid"][0]:
+        return True, None
+    return False, result["errors"][0]
 
-    for col, expected_type in schema.items():
-        value = row.get(col, None)
-        try:
-            if not isinstance(value, expected_type):
-                # Attempt to convert the value if it's not of the correct type
-                expected_type(value)
-        except (ValueError, TypeError):
-            return (
-                False,
-                f"Incorrect type for column '{col}'. Expected {expected_type}, found {type(value)}.",
-            )
 
-    return True, None
+def detect_encoding(sample: bytes) -> str:
+    """
+    Detect the encoding of a sample of bytes.
+
+    A byte order mark or a sample that decodes as UTF-8 is recognized without
+    statistical detection; charset_normalizer is only used for other samples.
+
+    Args:
+        sample (bytes): The first bytes of a file.
+
+    Returns:
+        str: The detected encoding.
+    """
+    for bom, encoding in BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+
+    try:
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # The sample may end in the middle of a multi-byte character
+        if e.reason == "unexpected end of data" and e.start >= len(sample) - 3:
+            return "utf-8"
+
+    return charset_normalizer.detect(sample)["encoding"]
+
+
+def sniff_encoding(file_path: Path, file) -> str:
+    """
+    Detect the encoding of an open binary file, using the per-file cache.
+
+    The sample is read from the given file, which is then rewound so the
+    same handle can be used to read the content.
+
+    Args:
+        file_path (Path): The path to the file, used as cache key with its mtime.
+        file (file object): The file opened in binary mode.
+
+    Returns:
+        str: The detected encoding of the file.
+    """
+    key = (str(file_path), os.fstat(file.fileno()).st_mtime_ns)
+    encoding = _encoding_cache.get(key)
+    if encoding is None:
+        logging.debug("Detecting encoding for file: %s", file_path)
+        encoding = detect_encoding(file.read(ENCODING_SAMPLE_SIZE))
+        file.seek(0)
+        _encoding_cache[key] = encoding
+        logging.debug("Detected encoding: %s", encoding)
+    return encoding
 
 
 def get_encoding(file_path: Path):
@@ -219,14 +435,98 @@ def get_encoding(file_path: Path):
     Returns:
         str: The detected encoding of the file.
     """
-    logging.debug(f"Detecting encoding for file: {file_path}")
-
     with file_path.open("rb") as file:
-        result = charset_normalizer.detect(file.read(10000))
+        return sniff_encoding(file_path, file)
+
+
+@contextmanager
+def open_text(file_path: Path, encoding=None):
+    """
+    Open a file for reading text, detecting its encoding on the same handle.
+
+    Args:
+        file_path (Path): The path to the file.
+        encoding (str, optional): The encoding of the file. Detected if not given.
+
+    Yields:
+        tuple: The file opened in text mode and its encoding.
+    """
+    with file_path.open("rb") as binary:
+        if encoding is None:
+            encoding = sniff_encoding(file_path, binary)
+        text = io.TextIOWrapper(binary, encoding=encoding, newline="")
+        try:
+            yield text, encoding
+        finally:
+            text.detach()
+
+
+def get_file_hash(file_path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 hash of a file's content.
+
+    Args:
+        file_path (Path): The path to the file.
+        chunk_size (int, optional): The number of bytes read at a time. Defaults to 1 MiB.
+
+    Returns:
+        str: The hexadecimal digest of the file's content.
+    """
+    logging.debug("Hashing file: %s", file_path)
+    digest = hashlib.sha256()
+    with Path(file_path).open("rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cache_name(file_path: Path) -> str:
+    """
+    Name the files derived from an input file, such as its row cache or title index.
+
+    The name keeps the file name for readability, followed by a hash of the
+    whole path, so files with the same name in different directories do not
+    share their derived files.
+
+    Args:
+        file_path (Path): The path to the input file.
+
+    Returns:
+        str: The name of the derived files, without extension.
+    """
+    path_hash = hashlib.sha256(Path(file_path).as_posix().encode("utf-8")).hexdigest()
+    return f"{Path(file_path).name}.{path_hash[:16]}"
+
+
+def get_file_fingerprint(file_path: Path, previous: dict = None) -> dict:
+    """
+    Compute the fingerprint of a file: its size, mtime and content hash.
+
+    The content hash is only recomputed when the size or mtime differs from
+    the previous fingerprint of the file.
+
+    Args:
+        file_path (Path): The path to the file.
+        previous (dict, optional): A fingerprint previously computed for the file.
 
-        encoding = result["encoding"]
-        logging.debug(f"Detected encoding: {encoding}")
-        return encoding
+    Returns:
+        dict: The path, size, mtime and content hash of the file.
+    """
+    stat = Path(file_path).stat()
+    fingerprint = {
+        "path": str(file_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+    if (
+        previous
+        and previous.get("size") == fingerprint["size"]
+        and previous.get("mtime") == fingerprint["mtime"]
+    ):
+        fingerprint["hash"] = previous["hash"]
+    else:
+        fingerprint["hash"] = get_file_hash(file_path)
+    return fingerprint
 
 
 def is_csv(file_path: Path) -> bool:
@@ -255,47 +555,172 @@ def is_json(file_path: Path) -> bool:
     return file_path.suffix == ".json"
 
 
-def process_file(file_path):
+def iter_file(file_path, batch_size=DEFAULT_BATCH_SIZE):
     """
-    Process a file based on its type (CSV or JSON), read its content,
-    and return the processed data.
+    Stream a file based on its type (CSV or JSON), yielding its validated
+    rows in chunks so that only one chunk at a time is held in memory.
 
     Args:
         file_path (Path): The path to the file.
+        batch_size (int, optional): The maximum number of rows per chunk.
 
-    Returns:
-        dict: A dictionary containing the processed data from the file.
-              The structure of the dictionary depends on the file type.
+    Yields:
+        dict: A chunk of valid and invalid rows, as yielded by ``validate_rows``.
     """
-    logging.debug(f"Processing file: {file_path}")
-    encoding = get_encoding(file_path)
-    # table_name = get_name_from_path(file_path)
+    logging.debug("Processing file: %s", file_path)
 
     if is_csv(file_path):
-        reader = read_rows(file_path, encoding)
-
+        yield from iter_rows(file_path, batch_size=batch_size)
     elif is_json(file_path):
-        reader = read_json(file_path, encoding)
+        yield from iter_json(file_path, batch_size=batch_size)
     else:
         message = "File extension must be either CSV or JSON."
         logging.error(message)
         raise Exception(message)
 
-    logging.debug(f"Finished processing file: {file_path}")
-    return reader
+    logging.debug("Finished processing file: %s", file_path)
+
+
+def process_file(file_path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Process a file based on its type (CSV or JSON), read its content,
+    and return the processed data.
+
+    Args:
+        file_path (Path): The path to the file.
+        batch_size (int, optional): The number of rows read and validated at a time.
+
+    Returns:
+        dict: A dictionary containing the processed data from the file.
+              The structure of the dictionary depends on the file type.
+    """
+    return merge_chunks(iter_file(file_path, batch_size))
+
+
+def get_umask():
+    """
+    Returns:
+        int: The file mode creation mask of the process.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Mode of the files created by open(). The umask is read once at import, as
+# reading it sets it to 0 for the whole process, and for the files other
+# threads create meanwhile.
+DEFAULT_FILE_MODE = 0o666 & ~get_umask()
+
+
+@contextmanager
+def atomic_write(output_file, encoding="utf-8", mode=DEFAULT_FILE_MODE):
+    """
+    Open a temporary file next to the output file, and rename it to the
+    output file once it is completely written.
+
+    Readers of the output file never see a partially written file, and the
+    previous version is kept if writing fails. The output file gets the mode
+    of a file created by open(), instead of the owner-only mode of the
+    temporary file.
 
+    Args:
+        output_file (str): The path to the output file.
+        encoding (str, optional): The encoding for the output file. Defaults to 'utf-8'.
+        mode (int, optional): The mode of the output file. Defaults to the mode of
+                              files created by open(), under the umask at import.
 
-def save_to_json(data, output_file, encoding="utf-8"):
+    Yields:
+        file object: The temporary file opened for writing text.
+    """
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    file = tempfile.NamedTemporaryFile(
+        "w",
+        encoding=encoding,
+        newline="",
+        dir=output_file.parent,
+        prefix=f".{output_file.name}.",
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with file:
+            yield file
+        os.chmod(file.name, mode)
+        os.replace(file.name, output_file)
+    except BaseException:
+        os.unlink(file.name)
+        raise
+
+
+def write_json_items(items, file, output_format="json"):
+    """
+    Write items to a file one at a time, as a JSON array or as NDJSON.
+
+    Only one item is serialized at a time, so the items can be produced
+    lazily. The 'json' format is identical to ``json.dump(list(items), file, indent=4)``.
+
+    Args:
+        items (iterable): The items to write, each serializable to JSON.
+        file (file object): The file to write to.
+        output_format (str, optional): 'json' for an indented array, 'compact' for an
+                                       array without whitespace, or 'ndjson' for one item per line.
+
+    Returns:
+        int: The number of items written.
+    """
+    if output_format not in JSON_OUTPUT_FORMATS:
+        message = f"JSON output format must be one of {JSON_OUTPUT_FORMATS}, got '{output_format}'."
+        logging.error(message)
+        raise ValueError(message)
+
+    count = 0
+    if output_format == "ndjson":
+        for item in items:
+            file.write(json.dumps(item, separators=(",", ":")))
+            file.write("\n")
+            count += 1
+        return count
+
+    compact = output_format == "compact"
+    for item in items:
+        if compact:
+            file.write("," if count else "[")
+            file.write(json.dumps(item, separators=(",", ":")))
+        else:
+            file.write(",\n    " if count else "[\n    ")
+            file.write(json.dumps(item, indent=4).replace("\n", "\n    "))
+        count += 1
+
+    if not count:
+        file.write("[]")
+    else:
+        file.write("]" if compact else "\n]")
+    return count
+
+
+def save_to_json(data, output_file, encoding="utf-8", output_format="json"):
     """
     Save data to a JSON file.
 
+    Lists and other iterables are streamed one item at a time, so a generator
+    can be saved without materializing all of its items. The file is written
+    to a temporary file first and atomically renamed.
+
     Args:
         data: The data to be saved, which can be serialized to JSON.
         output_file (str): The path to the output JSON file.
         encoding (str, optional): The encoding for the output file. Defaults to 'utf-8'.
+        output_format (str, optional): 'json', 'compact' or 'ndjson', see ``write_json_items``.
+                                       Data that is not a list or an iterable is always
+                                       written as indented JSON.
     """
 
-    with open(output_file, "w", encoding=encoding) as file:
-        json.dump(data, file, indent=4)
+    with atomic_write(output_file, encoding) as file:
+        if isinstance(data, (list, Iterator)):
+            write_json_items(data, file, output_format)
+        else:
+            json.dump(data, file, indent=4)
 
     logging.info(f"Data saved to JSON file: {output_file}")
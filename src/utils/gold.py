@@ -0,0 +1,294 @@
+import bisect
+import json
+import logging
+import mmap
+from pathlib import Path
+
+from src.utils.constants import PUBLICATION_TABLE_NAMES
+from src.utils.dates import day_to_date, to_day
+from src.utils.file import atomic_write
+
+
+# Version of the sidecar index format, in version 1 each key had a single line
+INDEX_VERSION = 2
+
+
+def index_path(output_file):
+    """
+    Get the path of the sidecar index of an NDJSON gold file.
+
+    Args:
+        output_file (Path): The path to the NDJSON file.
+
+    Returns:
+        Path: The path to its index, next to it with an '.index.json' suffix.
+    """
+    return Path(output_file).with_suffix(".index.json")
+
+
+def save_ndjson_with_index(items, output_file, key="drug", encoding="utf-8"):
+    """
+    Save items as NDJSON, one item at a time, with a sidecar index from the
+    key of each item to the byte offsets and lengths of its lines.
+
+    Items sharing a key, such as two drugs with the same ATC code, each keep
+    their line in the index, in the order they were saved.
+
+    Args:
+        items (iterable): The items to save, each a dictionary containing the key.
+        output_file (Path): The path to the NDJSON file.
+        key (str, optional): The field identifying each item. Defaults to 'drug'.
+        encoding (str, optional): The encoding for the output file. Defaults to 'utf-8'.
+
+    Returns:
+        dict: The index, mapping each key to the offset and length of each of its lines.
+    """
+    offsets = {}
+    offset = 0
+    count = 0
+    with atomic_write(output_file, encoding) as file:
+        for item in items:
+            line = json.dumps(item, separators=(",", ":"))
+            length = len(line.encode(encoding))
+            offsets.setdefault(item[key], []).append([offset, length])
+            file.write(line)
+            file.write("\n")
+            offset += length + 1
+            count += 1
+
+    with atomic_write(index_path(output_file), encoding) as file:
+        json.dump(
+            {"version": INDEX_VERSION, "key": key, "size": offset, "offsets": offsets}, file
+        )
+
+    logging.info(
+        f"Data saved to NDJSON file: {output_file} "
+        f"({count} items indexed under {len(offsets)} keys)"
+    )
+    return offsets
+
+
+class MentionReader:
+    """
+    Random access to the drugs of an NDJSON gold file by ATC code.
+
+    The file is memory-mapped and the sidecar index gives the position of
+    each drug's line, so looking up a drug only reads and parses that line.
+    """
+
+    def __init__(self, file_path):
+        """
+        Args:
+            file_path (Path): The path to the NDJSON gold file.
+
+        Raises:
+            ValueError: If the index does not match the gold file.
+        """
+        self.file_path = Path(file_path)
+        with index_path(self.file_path).open("r", encoding="utf-8") as file:
+            index = json.load(file)
+        self.offsets = index["offsets"]
+        if index.get("version", 1) < 2:
+            self.offsets = {key: [span] for key, span in self.offsets.items()}
+
+        size = self.file_path.stat().st_size
+        if size != index["size"]:
+            message = f"Index of {self.file_path} is out of date: expected {index['size']} bytes, found {size}."
+            logging.error(message)
+            raise ValueError(message)
+
+        self._file = self.file_path.open("rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def get(self, atccode):
+        """
+        Get the mentions of a drug.
+
+        Args:
+            atccode (str): The ATC code of the drug.
+
+        Returns:
+            dict: The drug's mentions, or None if the drug is not mentioned. When
+                  several drugs share the ATC code, the first one saved.
+        """
+        spans = self.offsets.get(atccode)
+        if not spans:
+            return None
+        offset, length = spans[0]
+        return json.loads(self._map[offset : offset + length])
+
+    def get_all(self, atccode):
+        """
+        Get the mentions of every drug with an ATC code.
+
+        Args:
+            atccode (str): The ATC code of the drugs.
+
+        Returns:
+            list: The mentions of each drug with the ATC code, in the order they were saved.
+        """
+        return [
+            json.loads(self._map[offset : offset + length])
+            for offset, length in self.offsets.get(atccode, [])
+        ]
+
+    def __contains__(self, atccode):
+        return atccode in self.offsets
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def close(self):
+        """Release the memory map and the file"""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def month_partition(day):
+    """
+    Args:
+        day (int): A day number, as returned by parse_date.
+
+    Returns:
+        str: The month partition of the day, as 'YYYY-MM'.
+    """
+    return day_to_date(day).strftime("%Y-%m")
+
+
+class MentionTimeIndex:
+    """
+    Publications mentioning each drug, partitioned by month for date range queries.
+
+    Each partition holds the mentions of a month sorted by day number, so a
+    query only reads the partitions overlapping the range and bisects the
+    first and last ones, instead of scanning the whole gold output.
+    """
+
+    def __init__(self, partitions=None):
+        """
+        Args:
+            partitions (dict, optional): For each ATC code, the mentions of each month
+                                         as [day, table, id, date] lists sorted by day.
+        """
+        self.partitions = partitions if partitions is not None else {}
+        self._months = {}
+        self.undated = 0
+
+    def observe(self, mention):
+        """
+        Add the publications of one drug to the index.
+
+        Args:
+            mention (dict): The mentions of a drug, as produced by find_drug_mentions.
+        """
+        drug_partitions = self.partitions.setdefault(mention["drug"], {})
+        for table in PUBLICATION_TABLE_NAMES:
+            for publication in mention.get(table, []):
+                # Day number parsed once at ingest, carried by the mention entry
+                day = publication.get("day")
+                if day is None:
+                    self.undated += 1
+                    continue
+                drug_partitions.setdefault(month_partition(day), []).append(
+                    [day, table, publication.get("id"), publication.get("date")]
+                )
+        for entries in drug_partitions.values():
+            entries.sort(key=lambda item: item[0])
+        self._months.pop(mention["drug"], None)
+
+    def track(self, mentions):
+        """
+        Index mentions while they flow to another consumer, such as the gold writer.
+
+        Args:
+            mentions (iterable): The mentions of each drug.
+
+        Yields:
+            dict: Each mention, after it has been indexed.
+        """
+        for mention in mentions:
+            self.observe(mention)
+            yield mention
+
+    def query(self, atccode, start=None, end=None):
+        """
+        Get the publications mentioning a drug between two dates.
+
+        Args:
+            atccode (str): The ATC code of the drug.
+            start (optional): The first day of the range, as a day number, a
+                              datetime.date or a date string. Defaults to no lower bound.
+            end (optional): The last day of the range, included. Defaults to no upper bound.
+
+        Returns:
+            list: The publications as dictionaries with their 'table', 'id' and
+                  'date', sorted by date.
+
+        Raises:
+            ValueError: If a bound is not a valid date.
+        """
+        bounds = []
+        for bound in (start, end):
+            day = to_day(bound) if bound is not None else None
+            if bound is not None and day is None:
+                message = f"Invalid date bound: {bound!r}"
+                logging.error(message)
+                raise ValueError(message)
+            bounds.append(day)
+        start_day, end_day = bounds
+
+        drug_partitions = self.partitions.get(atccode)
+        if not drug_partitions:
+            return []
+        months = self._months.get(atccode)
+        if months is None:
+            months = self._months[atccode] = sorted(drug_partitions)
+
+        first = 0 if start_day is None else bisect.bisect_left(months, month_partition(start_day))
+        last = len(months) if end_day is None else bisect.bisect_right(months, month_partition(end_day))
+
+        results = []
+        for month in months[first:last]:
+            entries = drug_partitions[month]
+            # A one-item list sorts before every entry of the same day
+            low = 0 if start_day is None else bisect.bisect_left(entries, [start_day])
+            high = len(entries) if end_day is None else bisect.bisect_left(entries, [end_day + 1])
+            results.extend(
+                {"table": table, "id": publication_id, "date": date}
+                for _, table, publication_id, date in entries[low:high]
+            )
+        return results
+
+    def save(self, output_file, encoding="utf-8"):
+        """
+        Args:
+            output_file (Path): The path to the index file.
+            encoding (str, optional): The encoding for the output file. Defaults to 'utf-8'.
+        """
+        with atomic_write(output_file, encoding) as file:
+            json.dump({"partition": "month", "drugs": self.partitions}, file)
+        if self.undated:
+            logging.warning(f"{self.undated} mentions without a valid date are not in {output_file}")
+        logging.info(f"Mention time index saved to: {output_file}")
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Args:
+            file_path (Path): The path to the index file.
+
+        Returns:
+            MentionTimeIndex: The loaded index.
+        """
+        with Path(file_path).open("r", encoding="utf-8") as file:
+            return cls(json.load(file)["drugs"])
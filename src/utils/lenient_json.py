@@ -0,0 +1,373 @@
+import codecs
+import json
+import logging
+
+# Description of the repairs made by the lenient parser
+TRAILING_COMMA = "removed trailing comma"
+
+
+# Characters that can continue a number, as in '3.' of '3.25' or '1e' of '1e+21'
+NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+
+class ValueScanner:
+    """
+    Scanner finding the end of the JSON object or array starting at a position,
+    and the trailing commas it contains, in a single pass.
+
+    The text can be given in several steps, each time with more characters
+    at its end: scanning resumes where it stopped, so each character is only
+    scanned once however many blocks the value spans.
+    """
+
+    def __init__(self, start):
+        """
+        Args:
+            start (int): The position of the opening bracket of the value.
+        """
+        self.position = start
+        # Positions of commas directly followed by a closing bracket
+        self.commas = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._last = None
+
+    def shift(self, count):
+        """
+        Move the positions back after the first characters of the text were discarded.
+
+        Args:
+            count (int): The number of characters discarded, all before the value.
+        """
+        self.position -= count
+        self.commas = [comma - count for comma in self.commas]
+        if self._last is not None:
+            self._last -= count
+
+    def scan(self, text):
+        """
+        Scan the text from where the previous scan stopped.
+
+        Args:
+            text (str): The text holding the value.
+
+        Returns:
+            int: The position after the closing bracket, or None if the value is
+                 not complete in the text.
+        """
+        depth = self._depth
+        in_string = self._in_string
+        escaped = self._escaped
+        last = self._last
+        end = None
+
+        for position in range(self.position, len(text)):
+            char = text[position]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+                continue
+            if char.isspace():
+                continue
+            if char == '"':
+                in_string = True
+            elif char in "{[":
+                depth += 1
+            elif char in "}]":
+                if last is not None and text[last] == ",":
+                    self.commas.append(last)
+                depth -= 1
+                if depth == 0:
+                    end = position + 1
+                    break
+            last = position
+        else:
+            position = len(text)
+
+        self.position = position if end is None else end
+        self._depth = depth
+        self._in_string = in_string
+        self._escaped = escaped
+        self._last = last
+        return end
+
+
+def scan_value(text, start):
+    """
+    Find the end of the JSON object or array starting at a position, and the
+    trailing commas it contains, in a single pass.
+
+    Args:
+        text (str): The text to scan.
+        start (int): The position of the opening bracket of the value.
+
+    Returns:
+        tuple: A tuple containing:
+               - end (int): The position after the closing bracket, or None if the
+                            value is not complete in the text.
+               - commas (list): The positions of commas directly followed by a
+                                closing bracket.
+    """
+    scanner = ValueScanner(start)
+    return scanner.scan(text), scanner.commas
+
+
+def may_continue(element, text, end):
+    """
+    Check whether a decoded element is a number that more text could continue.
+
+    Args:
+        element: The decoded element.
+        text (str): The text the element was decoded from.
+        end (int): The position after the element in the text.
+
+    Returns:
+        bool: True if the element is a number followed by nothing but characters
+              that can continue a number, up to the end of the text.
+    """
+    if isinstance(element, bool) or not isinstance(element, (int, float)):
+        return False
+    return all(char in NUMBER_CHARS for char in text[end:])
+
+
+class LenientJSONArrayParser:
+    """
+    Streaming parser for a top-level JSON array that tolerates trailing commas.
+
+    Elements are decoded one at a time with the C JSON decoder. Only an
+    element that fails to decode is scanned for trailing commas, which are
+    removed before decoding it again, so well-formed elements are never
+    scanned twice. Each repair is recorded with its byte offset in the file.
+    """
+
+    def __init__(self, file, block_size=1 << 16, encoding=None):
+        """
+        Args:
+            file (file object): A text file positioned at the start of the array.
+            block_size (int, optional): The number of characters read at a time.
+            encoding (str, optional): The encoding of the file, used to report repairs
+                                      as byte offsets. Offsets are not computed if not given.
+        """
+        self.file = file
+        self.block_size = block_size
+        self.repairs = []
+        self._decoder = json.JSONDecoder()
+        self._encoder = codecs.getincrementalencoder(encoding)() if encoding else None
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+        # Number of bytes before the buffer, and repairs in the buffer not yet located
+        self._offset = 0
+        self._pending = []
+
+    def _fill(self):
+        """
+        Discard the parsed part of the buffer and read the next block.
+
+        At least as many characters as are left in the buffer are read, so
+        an element spanning many blocks is copied a bounded number of times.
+        """
+        self._locate_repairs(self._position)
+        block = self.file.read(max(self.block_size, len(self._buffer) - self._position))
+        self._buffer = self._buffer[self._position :] + block
+        self._position = 0
+        self._eof = not block
+
+    def _locate_repairs(self, end):
+        """
+        Convert the pending repairs to byte offsets and account for the bytes
+        of the buffer up to a position.
+
+        Args:
+            end (int): The position in the buffer up to which bytes are counted.
+        """
+        if self._encoder is None:
+            self.repairs.extend(
+                {"offset": None, "repair": repair} for _, repair in self._pending
+            )
+            self._pending = []
+            return
+        start = 0
+        for position, repair in self._pending:
+            self._offset += len(self._encoder.encode(self._buffer[start:position]))
+            self.repairs.append({"offset": self._offset, "repair": repair})
+            start = position
+        self._offset += len(self._encoder.encode(self._buffer[start:end]))
+        self._pending = []
+
+    def _skip_whitespace(self):
+        while True:
+            buffer = self._buffer
+            position = self._position
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            self._position = position
+            if position < len(buffer) or self._eof:
+                return
+            self._fill()
+
+    def _peek(self):
+        if self._position < len(self._buffer):
+            return self._buffer[self._position]
+        return None
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self._buffer, self._position)
+
+    def _repair(self):
+        """
+        Decode the object or array at the current position after removing its
+        trailing commas, reading more blocks until it is complete.
+
+        Returns:
+            tuple: The decoded element and the position after it in the buffer.
+        """
+        scanner = ValueScanner(self._position)
+        end = scanner.scan(self._buffer)
+        while end is None and not self._eof:
+            # The buffer is moved to start at the value, resume scanning after it
+            discarded = self._position
+            self._fill()
+            scanner.shift(discarded)
+            end = scanner.scan(self._buffer)
+        if end is None:
+            raise self._error("Unterminated value")
+        commas = scanner.commas
+
+        pieces = []
+        previous = self._position
+        for comma in commas:
+            pieces.append(self._buffer[previous:comma])
+            previous = comma + 1
+        pieces.append(self._buffer[previous:end])
+        try:
+            element = json.loads("".join(pieces))
+        except json.JSONDecodeError as e:
+            raise self._error(f"Cannot repair value: {e.msg}") from e
+
+        self._pending.extend((comma, TRAILING_COMMA) for comma in commas)
+        return element, end
+
+    def _decode_element(self):
+        """
+        Decode the element at the current position, reading more blocks until
+        it is complete and repairing it if needed.
+
+        Returns:
+            The decoded element.
+        """
+        while True:
+            try:
+                element, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if self._peek() in ("{", "["):
+                    element, end = self._repair()
+                    break
+                if self._eof:
+                    raise
+                self._fill()
+                continue
+            # A number at the end of the buffer, such as '3.' of '3.25', may
+            # continue in the next block
+            if self._eof or not may_continue(element, self._buffer, end):
+                break
+            self._fill()
+        self._position = end
+        return element
+
+    def _skip_trailing_comma(self):
+        """
+        Consume the comma at the current position.
+
+        Returns:
+            bool: True if the comma is directly followed by the closing bracket
+                  of the array, which is then the current position.
+        """
+        comma = self._position
+        look = comma + 1
+        while True:
+            while look < len(self._buffer) and self._buffer[look].isspace():
+                look += 1
+            if look < len(self._buffer) or self._eof:
+                break
+            # Keep the comma in the buffer while reading ahead
+            self._position = comma
+            self._fill()
+            look -= comma
+            comma = 0
+
+        if look < len(self._buffer) and self._buffer[look] == "]":
+            self._pending.append((comma, TRAILING_COMMA))
+            self._position = look
+            return True
+        self._position = comma + 1
+        return False
+
+    def __iter__(self):
+        """
+        Yields:
+            The decoded elements of the array.
+
+        Raises:
+            json.JSONDecodeError: If the content cannot be repaired into a JSON array.
+        """
+        self._skip_whitespace()
+        if self._peek() != "[":
+            raise self._error("Expecting '['")
+        self._position += 1
+
+        while True:
+            self._skip_whitespace()
+            if self._peek() == "]":
+                break
+            if self._peek() is None:
+                raise self._error("Expecting value")
+
+            yield self._decode_element()
+
+            self._skip_whitespace()
+            if self._peek() == ",":
+                if self._skip_trailing_comma():
+                    break
+            elif self._peek() == "]":
+                break
+            else:
+                raise self._error("Expecting ',' delimiter")
+
+        self._locate_repairs(self._position)
+        if self.repairs:
+            logging.debug(f"Repaired {len(self.repairs)} JSON defects")
+
+
+def iter_json_array(file, block_size=1 << 16, encoding=None, repairs=None):
+    """
+    Incrementally parse the elements of a top-level JSON array.
+
+    The file is read in blocks and each element is decoded as soon as it is
+    complete, so only one element at a time is held in memory. Trailing
+    commas before a closing bracket are removed.
+
+    Args:
+        file (file object): A text file positioned at the start of the array.
+        block_size (int, optional): The number of characters read at a time.
+        encoding (str, optional): The encoding of the file, needed to report repairs.
+        repairs (list, optional): A list to which each repair is appended as a
+                                  dictionary with its byte 'offset' and a 'repair' description.
+
+    Yields:
+        The decoded elements of the array.
+
+    Raises:
+        json.JSONDecodeError: If the content cannot be repaired into a JSON array.
+    """
+    parser = LenientJSONArrayParser(file, block_size, encoding)
+    try:
+        yield from parser
+    finally:
+        if repairs is not None:
+            repairs.extend(parser.repairs)
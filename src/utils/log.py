@@ -0,0 +1,143 @@
+import atexit
+import logging
+import logging.handlers
+import multiprocessing
+import time
+from pathlib import Path
+
+# Handler and listener installed by setup_queue_logging
+_queue_handler = None
+_listener = None
+
+
+def setup_queue_logging(level="INFO", log_format=None, filename=None):
+    """
+    Configure the root logger to hand records to a background thread.
+
+    Logging calls only put the record on a queue; formatting and writing to
+    the console or file happen in a listener thread, so slow log I/O does
+    not block the pipeline. Calling it again replaces the previous setup.
+
+    Args:
+        level (str, optional): The logging level. Defaults to 'INFO'.
+        log_format (str, optional): The format of the records.
+        filename (str, optional): The file to log to. Logs to stderr if not given.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener.
+    """
+    global _queue_handler, _listener
+    stop_queue_logging()
+
+    if filename:
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.FileHandler(filename)
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(log_format))
+
+    # A process queue, so worker processes forked by the pools log through it too
+    records = multiprocessing.Queue()
+    _queue_handler = logging.handlers.QueueHandler(records)
+    _listener = logging.handlers.QueueListener(records, handler)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    _listener.start()
+    return _listener
+
+
+def stop_queue_logging():
+    """Flush the queued records and remove the handler of setup_queue_logging"""
+    global _queue_handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+atexit.register(stop_queue_logging)
+
+
+class ProgressLogger:
+    """
+    Aggregated progress logging for loops over many items.
+
+    Instead of one record per item, a record is emitted every ``every``
+    items or every ``interval`` seconds, whichever comes first, and once
+    when the loop is done. When the level is disabled, updating is a
+    counter increment.
+    """
+
+    def __init__(self, message, every=10000, interval=10.0, level=logging.INFO, total=None):
+        """
+        Args:
+            message (str): What the items are, as in 'Extracted mentions for drugs'.
+            every (int, optional): The number of items between records.
+            interval (float, optional): The maximum number of seconds between records.
+            level (int, optional): The logging level of the records. Defaults to INFO.
+            total (int, optional): The expected number of items, if known.
+        """
+        self.message = message
+        self.every = every
+        self.interval = interval
+        self.level = level
+        self.total = total
+        self.count = 0
+        self.enabled = logging.getLogger().isEnabledFor(level)
+        self._start = time.perf_counter()
+        self._next_count = every
+        self._next_time = self._start + interval
+
+    def _log(self, done=False):
+        elapsed = time.perf_counter() - self._start
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        of_total = f"/{self.total}" if self.total is not None else ""
+        logging.log(
+            self.level,
+            "%s: %d%s items in %.2fs (%.0f/s)%s",
+            self.message,
+            self.count,
+            of_total,
+            elapsed,
+            rate,
+            "" if done else "...",
+        )
+
+    def update(self, count=1):
+        """
+        Args:
+            count (int, optional): The number of items processed since the last update.
+        """
+        self.count += count
+        if not self.enabled:
+            return
+        if self.count >= self._next_count or time.perf_counter() >= self._next_time:
+            self._log()
+            self._next_count = self.count + self.every
+            self._next_time = time.perf_counter() + self.interval
+
+    def done(self):
+        """Log the final count"""
+        if self.enabled:
+            self._log(done=True)
+
+    def track(self, items):
+        """
+        Count items while they are consumed, and log the final count at the end.
+
+        Args:
+            items (iterable): The items.
+
+        Yields:
+            The items.
+        """
+        for item in items:
+            self.update()
+            yield item
+        self.done()
@@ -0,0 +1,248 @@
+import cProfile
+import json
+import logging
+import re
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """
+    Returns:
+        int: The peak resident set size of the process in bytes, or None if unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def metric_name(name):
+    """
+    Args:
+        name (str): A name to use in a Prometheus metric name.
+
+    Returns:
+        str: The name with the characters Prometheus does not allow replaced by '_'.
+    """
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+class RunMetrics:
+    """
+    Per-stage timings, resource usage and counters of a run.
+
+    Each stage records its wall-clock and CPU time and the peak RSS of the
+    process at its end, plus any counters added to it, such as rows or bytes
+    read. Runs can also be profiled with cProfile, and tracemalloc can record
+    the peak memory allocated by Python during each stage.
+    """
+
+    def __init__(self, run_name, profile=False, trace_memory=False):
+        """
+        Args:
+            run_name (str): The name of the run, used as prefix of the Prometheus metrics.
+            profile (bool, optional): Profile the run with cProfile. Defaults to False.
+            trace_memory (bool, optional): Trace Python allocations with tracemalloc.
+                                           Defaults to False.
+        """
+        self.run_name = run_name
+        self.stages = {}
+        self.gauges = {}
+        self.profile = cProfile.Profile() if profile else None
+        self.trace_memory = trace_memory
+        self._start = None
+        self._end = None
+
+    def start(self):
+        """Start timing the run, and profiling or tracing it if enabled"""
+        self._start = (time.time(), time.perf_counter(), time.process_time())
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def finish(self):
+        """Stop timing, profiling and tracing the run"""
+        if self.profile is not None:
+            self.profile.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._end = (time.perf_counter(), time.process_time())
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Measure a stage of the run.
+
+        Args:
+            name (str): The name of the stage.
+
+        Yields:
+            dict: The counters of the stage, to which the stage can add values.
+        """
+        stage = self.stages.setdefault(
+            name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "counters": {}}
+        )
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield stage["counters"]
+        finally:
+            stage["wall_seconds"] += time.perf_counter() - wall
+            stage["cpu_seconds"] += time.process_time() - cpu
+            stage["peak_rss_bytes"] = peak_rss_bytes()
+            if self.trace_memory and tracemalloc.is_tracing():
+                stage["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+            logging.debug(
+                f"Stage {name} took {stage['wall_seconds']:.3f}s "
+                f"({stage['cpu_seconds']:.3f}s CPU)"
+            )
+
+    def count(self, stage_name, **counters):
+        """
+        Add to the counters of a stage, for example once its output is consumed.
+
+        Args:
+            stage_name (str): The name of the stage.
+            **counters: The values to add to each counter.
+        """
+        stage = self.stages.setdefault(
+            stage_name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "counters": {}}
+        )
+        for counter, value in counters.items():
+            stage["counters"][counter] = stage["counters"].get(counter, 0) + value
+
+    def set_gauge(self, name, value):
+        """
+        Record a value of the run, such as the matcher hit rate.
+
+        Args:
+            name (str): The name of the value.
+            value (float): The value.
+        """
+        self.gauges[name] = value
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The run report, with the rows per second of each stage that counts rows.
+        """
+        stages = {}
+        for name, stage in self.stages.items():
+            report = dict(stage, counters=dict(stage["counters"]))
+            rows = stage["counters"].get("rows")
+            if rows is not None and stage["wall_seconds"] > 0:
+                report["rows_per_second"] = rows / stage["wall_seconds"]
+            stages[name] = report
+
+        report = {"run": self.run_name, "stages": stages, "gauges": dict(self.gauges)}
+        if self._start is not None:
+            report["started_at"] = self._start[0]
+            end = self._end or (time.perf_counter(), time.process_time())
+            report["wall_seconds"] = end[0] - self._start[1]
+            report["cpu_seconds"] = end[1] - self._start[2]
+        report["peak_rss_bytes"] = peak_rss_bytes()
+        return report
+
+    def to_prometheus(self):
+        """
+        Returns:
+            str: The metrics of the run in the Prometheus text exposition format.
+        """
+        report = self.to_dict()
+        prefix = metric_name(self.run_name)
+        run_label = f'run="{self.run_name}"'
+
+        samples = {}
+        for stage_name, stage in report["stages"].items():
+            labels = f'{run_label},stage="{stage_name}"'
+            values = {
+                key: value
+                for key, value in stage.items()
+                if key != "counters" and value is not None
+            }
+            values.update(stage["counters"])
+            for key, value in values.items():
+                samples.setdefault(f"{prefix}_stage_{metric_name(key)}", []).append(
+                    (labels, value)
+                )
+        for key in ("wall_seconds", "cpu_seconds", "peak_rss_bytes"):
+            if report.get(key) is not None:
+                samples[f"{prefix}_{key}"] = [(run_label, report[key])]
+        for key, value in report["gauges"].items():
+            samples[f"{prefix}_{metric_name(key)}"] = [(run_label, value)]
+
+        lines = []
+        for name, values in samples.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{{{labels}}} {value}" for labels, value in values)
+        return "\n".join(lines) + "\n"
+
+    def save(self, report_path=None, prometheus_path=None, profile_path=None):
+        """
+        Export the metrics of the run.
+
+        Args:
+            report_path (Path, optional): The path of the JSON run report.
+            prometheus_path (Path, optional): The path of the Prometheus text file.
+            profile_path (Path, optional): The path of the cProfile statistics, if profiled.
+        """
+        if report_path is not None:
+            Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(report_path, "w") as f:
+                json.dump(self.to_dict(), f, indent=4)
+            logging.info(f"Run report saved to: {report_path}")
+        if prometheus_path is not None:
+            Path(prometheus_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(prometheus_path, "w") as f:
+                f.write(self.to_prometheus())
+            logging.info(f"Prometheus metrics saved to: {prometheus_path}")
+        if profile_path is not None and self.profile is not None:
+            Path(profile_path).parent.mkdir(parents=True, exist_ok=True)
+            self.profile.dump_stats(str(profile_path))
+            logging.info(f"Profile saved to: {profile_path}")
+
+
+def metrics_from_config(run_name, config):
+    """
+    Create the metrics of a run from the 'metrics' configuration.
+
+    Args:
+        run_name (str): The name of the run.
+        config (Config): The configuration.
+
+    Returns:
+        tuple: The started RunMetrics, and a function exporting them to the
+               files of the configuration, or doing nothing if metrics are disabled.
+    """
+    metrics_config = config.get("metrics", {}) or {}
+    metrics = RunMetrics(
+        run_name,
+        profile=metrics_config.get("profile", False),
+        trace_memory=metrics_config.get("tracemalloc", False),
+    )
+    metrics.start()
+
+    def export():
+        metrics.finish()
+        if not metrics_config.get("enabled", True):
+            return
+        output_dir = Path(metrics_config.get("dir") or config.get("paths", {}).get("logs", "logs"))
+        metrics.save(
+            output_dir / f"{run_name}_report.json",
+            output_dir / f"{run_name}.prom",
+            output_dir / f"{run_name}.prof",
+        )
+
+    return metrics, export
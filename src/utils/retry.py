@@ -1,28 +1,170 @@
 import time
+import random
+import asyncio
+import inspect
 import logging
+import threading
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, Optional
+
+# OS errors that will not go away by retrying
+PERMANENT_OS_ERRORS = (
+    FileNotFoundError,
+    FileExistsError,
+    IsADirectoryError,
+    NotADirectoryError,
+    PermissionError,
+)
+
+# Retry settings used when the decorator does not set them, see configure_retries
+RETRY_SETTINGS = {
+    "max_retries": 3,
+    "retry_delay": 1,
+    "backoff": 2,
+    "max_delay": 30,
+    "retry_budget": 10,
+}
+
+
+class RetryBudget:
+    """
+    Number of retries left for the whole run, shared by every retried function.
+
+    Once it is spent, failures are raised immediately, so a run where
+    everything fails stops quickly instead of backing off on every call.
+    """
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def consume(self) -> bool:
+        """Take one retry from the budget, returns False if none is left"""
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+_budget = RetryBudget(RETRY_SETTINGS["retry_budget"])
+
+
+def configure_retries(processing_config: dict) -> None:
+    """
+    Set the retry settings and reset the retry budget for a run.
+
+    Args:
+        processing_config: The 'processing' configuration, with optional 'max_retries',
+                           'retry_delay', 'retry_backoff', 'retry_max_delay' and
+                           'retry_budget' values
+    """
+    global _budget
+    for setting, key in [
+        ("max_retries", "max_retries"),
+        ("retry_delay", "retry_delay"),
+        ("backoff", "retry_backoff"),
+        ("max_delay", "retry_max_delay"),
+        ("retry_budget", "retry_budget"),
+    ]:
+        if processing_config.get(key) is not None:
+            RETRY_SETTINGS[setting] = processing_config[key]
+    _budget = RetryBudget(RETRY_SETTINGS["retry_budget"])
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Tell whether an error may succeed when retried.
+
+    I/O errors such as timeouts, dropped connections or stale handles on
+    shared storage are transient. Missing files, permissions and every other
+    error, such as parse or validation errors, are permanent.
+    """
+    if isinstance(error, PERMANENT_OS_ERRORS):
+        return False
+    return isinstance(error, OSError)
+
+
+def backoff_delay(attempt: int, retry_delay: float, backoff: float, max_delay: float) -> float:
+    """
+    Delay before a retry, with exponential backoff and full jitter.
+
+    Args:
+        attempt: The number of the failed attempt, starting at 0
+        retry_delay: The base delay in seconds
+        backoff: The factor applied to the delay after each attempt
+        max_delay: The maximum delay in seconds
+
+    Returns:
+        A random delay between 0 and the backed off delay
+    """
+    return random.uniform(0, min(max_delay, retry_delay * backoff ** attempt))
+
 
 def retry_on_error(
-    max_retries: int = 3,
-    retry_delay: int = 1,
-    exceptions: tuple = (Exception,)
+    max_retries: Optional[int] = None,
+    retry_delay: Optional[float] = None,
+    exceptions: tuple = (Exception,),
+    retry_if: Callable[[BaseException], bool] = is_transient,
 ) -> Callable:
-    """Decorator for retrying operations that may fail"""
+    """
+    Decorator for retrying operations that may fail with transient errors.
+
+    Works on functions and coroutine functions. Settings left to None are
+    read from RETRY_SETTINGS on each call, see configure_retries.
+
+    Args:
+        max_retries: The maximum number of attempts
+        retry_delay: The base delay in seconds before the first retry
+        exceptions: The exceptions that may be retried, others are raised immediately
+        retry_if: Tells whether a caught exception is worth retrying
+    """
     def decorator(func: Callable) -> Callable:
+        def next_delay(attempt: int, error: BaseException) -> float:
+            """Return the delay before the next attempt, or raise the error"""
+            attempts = max_retries if max_retries is not None else RETRY_SETTINGS["max_retries"]
+            if not retry_if(error):
+                logging.error(f"{func.__name__} failed with a permanent error: {str(error)}")
+                raise error
+            if attempt >= attempts - 1:
+                logging.error(f"Failed after {attempts} attempts: {str(error)}")
+                raise error
+            if not _budget.consume():
+                logging.error(f"Retry budget exhausted, not retrying: {str(error)}")
+                raise error
+            delay = backoff_delay(
+                attempt,
+                retry_delay if retry_delay is not None else RETRY_SETTINGS["retry_delay"],
+                RETRY_SETTINGS["backoff"],
+                RETRY_SETTINGS["max_delay"],
+            )
+            logging.warning(
+                f"Attempt {attempt + 1} failed: {str(error)}. Retrying in {delay:.2f}s..."
+            )
+            return delay
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                attempt = 0
+                while True:
+                    try:
+                        return await func(*args, **kwargs)
+                    except exceptions as e:
+                        delay = next_delay(attempt, e)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            for attempt in range(max_retries):
+            attempt = 0
+            while True:
                 try:
                     return func(*args, **kwargs)
                 except exceptions as e:
-                    if attempt == max_retries - 1:
-                        logging.error(f"Failed after {max_retries} attempts: {str(e)}")
-                        raise
-                    logging.warning(
-                        f"Attempt {attempt + 1} failed: {str(e)}. Retrying..."
-                    )
-                    time.sleep(retry_delay)
-            return None
+                    delay = next_delay(attempt, e)
+                time.sleep(delay)
+                attempt += 1
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
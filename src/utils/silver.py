@@ -0,0 +1,273 @@
+import json
+import logging
+from pathlib import Path
+
+from src.records import RECORD_TYPES, records_from_columns, to_records
+from src.utils.constants import SCHEMA
+from src.utils.file import save_to_json
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - depends on the installed extras
+    pa = None
+
+SILVER_FORMATS = ("arrow", "json")
+
+# Arrow type of each schema type
+ARROW_TYPES = {str: "string", int: "int64", float: "float64"}
+
+
+def resolve_format(silver_format):
+    """
+    Resolve the silver format to use, falling back to JSON without pyarrow.
+
+    Args:
+        silver_format (str): The requested format, either 'arrow' or 'json'.
+
+    Returns:
+        str: The format actually used.
+    """
+    if silver_format not in SILVER_FORMATS:
+        message = f"Silver format must be one of {SILVER_FORMATS}, got '{silver_format}'."
+        logging.error(message)
+        raise ValueError(message)
+    if silver_format == "arrow" and pa is None:
+        logging.warning("pyarrow is not installed, writing the silver layer as JSON")
+        return "json"
+    return silver_format
+
+
+def silver_path(table_name, silver_dir, silver_format):
+    """
+    Get the path of a silver table.
+
+    Args:
+        table_name (str): The name of the table.
+        silver_dir (Path): The silver layer directory.
+        silver_format (str): The format of the table, either 'arrow' or 'json'.
+
+    Returns:
+        Path: The path of the silver table.
+    """
+    return Path(silver_dir) / f"{table_name}.{silver_format}"
+
+
+def silver_files_path(table_name, silver_dir, silver_format):
+    """
+    Get the path of the list of files a silver table was built from.
+
+    Args:
+        table_name (str): The name of the table.
+        silver_dir (Path): The silver layer directory.
+        silver_format (str): The format of the table, either 'arrow' or 'json'.
+
+    Returns:
+        Path: The path of the file list, next to the silver table.
+    """
+    return Path(silver_dir) / f"{table_name}.{silver_format}.files.json"
+
+
+def save_silver_files(files, table_name, silver_dir, silver_format):
+    """
+    Save the list of files a silver table was built from.
+
+    Args:
+        files (list): The path, content hash and number of valid rows of each
+                      file, in row order.
+        table_name (str): The name of the table.
+        silver_dir (Path): The silver layer directory.
+        silver_format (str): The format of the table, either 'arrow' or 'json'.
+    """
+    save_to_json(files, silver_files_path(table_name, silver_dir, silver_format))
+
+
+def load_silver_files(table_name, silver_dir, silver_format):
+    """
+    Load the list of files a silver table was built from.
+
+    Args:
+        table_name (str): The name of the table.
+        silver_dir (Path): The silver layer directory.
+        silver_format (str): The format of the table, either 'arrow' or 'json'.
+
+    Returns:
+        list: The path, content hash and number of valid rows of each file, in
+              row order, or None if the table has no file list.
+    """
+    files_path = silver_files_path(table_name, silver_dir, silver_format)
+    if not files_path.exists():
+        return None
+    with files_path.open("r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def silver_columns(table_name):
+    """
+    Get the columns of a silver table, with their type.
+
+    Args:
+        table_name (str): The name of the table.
+
+    Returns:
+        dict: The schema columns of the table, followed by the attributes its
+              records derive from them at ingest, such as the day number of a
+              publication date.
+    """
+    return {**SCHEMA[table_name], **RECORD_TYPES[table_name].DERIVED}
+
+
+def coerce_value(value, expected_type):
+    """
+    Convert a value to the type expected by the schema.
+
+    Args:
+        value: The value to convert.
+        expected_type (type): The expected type.
+
+    Returns:
+        The converted value, or None if it cannot be converted.
+    """
+    if value is None or isinstance(value, expected_type):
+        return value
+    try:
+        return expected_type(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def coerce_rows(rows, table_name):
+    """
+    Convert the values of validated rows to the types of the table schema.
+
+    Args:
+        rows (list): The validated rows of the table.
+        table_name (str): The name of the table.
+
+    Returns:
+        list: The rows with typed values, restricted to the silver columns.
+    """
+    schema = silver_columns(table_name)
+    return [
+        {col: coerce_value(row.get(col), expected_type) for col, expected_type in schema.items()}
+        for row in rows
+    ]
+
+
+def save_silver(rows, table_name, silver_dir, silver_format="arrow"):
+    """
+    Save the validated rows of a table to the silver layer.
+
+    In Arrow format the table is written as an uncompressed Arrow IPC file
+    with one typed column per schema column, which can be memory-mapped and
+    read back column by column without copying.
+
+    Args:
+        rows (list): The validated rows of the table.
+        table_name (str): The name of the table.
+        silver_dir (Path): The silver layer directory.
+        silver_format (str, optional): Either 'arrow' or 'json'. Defaults to 'arrow'.
+
+    Returns:
+        Path: The path of the silver table.
+    """
+    silver_format = resolve_format(silver_format)
+    output_path = silver_path(table_name, silver_dir, silver_format)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if silver_format == "json":
+        save_to_json(coerce_rows(rows, table_name), output_path)
+        return output_path
+
+    column_types = silver_columns(table_name)
+    schema = pa.schema(
+        [(col, ARROW_TYPES[expected_type]) for col, expected_type in column_types.items()]
+    )
+    columns = {
+        col: [coerce_value(row.get(col), expected_type) for row in rows]
+        for col, expected_type in column_types.items()
+    }
+    table = pa.Table.from_pydict(columns, schema=schema)
+    with pa.OSFile(str(output_path), "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+
+    logging.info(f"Data saved to Arrow file: {output_path}")
+    return output_path
+
+
+def load_silver_columns(table_name, silver_dir, columns=None):
+    """
+    Memory-map an Arrow silver table and select some of its columns.
+
+    The returned columns reference the mapped file directly, so only the
+    pages actually accessed are read from disk.
+
+    Args:
+        table_name (str): The name of the table.
+        silver_dir (Path): The silver layer directory.
+        columns (list, optional): The columns to select. Defaults to all columns.
+
+    Returns:
+        pyarrow.Table: The selected columns of the table.
+    """
+    input_path = silver_path(table_name, silver_dir, "arrow")
+    logging.debug(f"Memory-mapping Arrow file: {input_path}")
+    table = pa.ipc.open_file(pa.memory_map(str(input_path), "r")).read_all()
+    return table.select(columns) if columns else table
+
+
+def load_silver(table_name, silver_dir, silver_format="arrow", columns=None):
+    """
+    Load the rows of a silver table.
+
+    Args:
+        table_name (str): The name of the table.
+        silver_dir (Path): The silver layer directory.
+        silver_format (str, optional): Either 'arrow' or 'json'. Defaults to 'arrow'.
+        columns (list, optional): The columns to load. Defaults to all columns.
+
+    Returns:
+        list: The rows of the table as dictionaries.
+    """
+    silver_format = resolve_format(silver_format)
+    if silver_format == "arrow":
+        return load_silver_columns(table_name, silver_dir, columns).to_pylist()
+
+    with silver_path(table_name, silver_dir, "json").open("r", encoding="utf-8") as file:
+        rows = json.load(file)
+    if columns:
+        rows = [{col: row[col] for col in columns} for row in rows]
+    return rows
+
+
+def load_silver_records(table_name, silver_dir, silver_format="arrow", columns=None):
+    """
+    Load the rows of a silver table as records.
+
+    Arrow tables are memory-mapped and only the selected columns are read,
+    each converted as a whole, without building a dictionary per row.
+    Record fields that are not selected are None.
+
+    Args:
+        table_name (str): The name of the table.
+        silver_dir (Path): The silver layer directory.
+        silver_format (str, optional): Either 'arrow' or 'json'. Defaults to 'arrow'.
+        columns (list, optional): The columns the consumer needs. Defaults to the
+                                  silver columns of the table.
+
+    Returns:
+        list: The records of the table.
+    """
+    silver_format = resolve_format(silver_format)
+    fields = RECORD_TYPES[table_name].__slots__
+    columns = list(columns or silver_columns(table_name))
+    if silver_format == "json":
+        return to_records(load_silver(table_name, silver_dir, "json", columns), table_name)
+
+    table = load_silver_columns(table_name, silver_dir, columns)
+    values = {col: table.column(col).to_pylist() for col in columns}
+    missing = [None] * table.num_rows
+    # Derived attributes that are not selected are computed again
+    return records_from_columns(
+        {**values, **{field: values.get(field, missing) for field in fields}}, table_name
+    )
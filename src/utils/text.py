@@ -0,0 +1,60 @@
+import re
+import unicodedata
+
+# Matching modes of find_drug_mentions, see processing.match_mode
+MATCH_MODES = ("substring", "word")
+
+# Runs of bytes written as escape sequences, such as "\xc3\xb1" for "ñ"
+ESCAPED_BYTES_PATTERN = re.compile(r"(?:\\x[0-9a-fA-F]{2})+")
+
+# Tokens of a normalized text: runs of letters and digits
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def _unescape_bytes(match):
+    data = bytes.fromhex(match[0].replace("\\x", ""))
+    return data.decode("utf-8", errors="ignore")
+
+
+def normalize_text(text):
+    """
+    Normalize a text for word matching.
+
+    Escaped UTF-8 bytes are decoded, then the text is NFKC normalized,
+    casefolded and stripped of its accents, and finally reduced to its
+    tokens. The tokens are joined by single spaces and the result is padded
+    with a space on each side, so a normalized name occurs in a normalized
+    text if and only if its tokens occur in the text at token boundaries.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The tokens of the text, separated and surrounded by single spaces.
+    """
+    text = ESCAPED_BYTES_PATTERN.sub(_unescape_bytes, text)
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(
+        char
+        for char in unicodedata.normalize("NFD", text)
+        if not unicodedata.combining(char)
+    )
+    return " " + " ".join(WORD_PATTERN.findall(text)) + " "
+
+
+def normalized_titles(publication):
+    """
+    Normalize the titles of a publication table once, and cache them in the table.
+
+    Args:
+        publication (dict): The publication table, as returned by process_publication.
+
+    Returns:
+        list: The normalized title of each row, see normalize_text.
+    """
+    titles = publication.get("normalized_titles")
+    if titles is None or len(titles) != len(publication["rows"]):
+        column = publication["search_column"]
+        titles = [normalize_text(row[column]) for row in publication["rows"]]
+        publication["normalized_titles"] = titles
+    return titles
@@ -1,23 +1,212 @@
-from src.utils.constants import PUBLICATION_TABLE_NAMES, SCHEMA
-from src.utils.file import save_to_json, combine_files_by_table_name
+from pathlib import Path
 
+from src.utils.constants import PUBLICATION_TABLE_NAMES, SCHEMA, DEFAULT_BATCH_SIZE
+from src.utils.file import (
+    combine_files_by_table_name,
+    get_cache_name,
+    group_files_by_table_name,
+)
+from src.utils.silver import (
+    load_silver_files,
+    load_silver_records,
+    resolve_format,
+    save_silver,
+    save_silver_files,
+    silver_files_path,
+    silver_path,
+)
+from src.index import SegmentedIndex, load_or_build_index
+
+def is_cached_table(table, file_paths, manifest, silver_format, silver_dir):
+    """
+    Check whether a silver table was built from exactly the given files, unchanged.
+
+    Args:
+        table (str): The name of the table.
+        file_paths (list): The current paths of the files of the table.
+        manifest (Manifest): The manifest of the previous runs.
+        silver_format (str): The format of the silver table.
+        silver_dir (Path): The silver layer directory.
+
+    Returns:
+        bool: True if the table can be read back from its silver table.
+    """
+    if not silver_path(table, silver_dir, silver_format).exists():
+        return False
+    files = load_silver_files(table, silver_dir, silver_format)
+    # Added or removed files change the rows, even when the others are unchanged
+    if files is None or [file["path"] for file in files] != sorted(map(str, file_paths)):
+        return False
+    return all(
+        manifest.is_unchanged(file_path)
+        and manifest.entries[str(file_path)]["hash"] == file["hash"]
+        for file_path, file in zip(sorted(file_paths, key=str), files)
+    )
+
+
+def find_cached_tables(table_files, manifest, silver_format, silver_dir):
+    """
+    Find the publication tables built from the same files as in the last run,
+    all of them unchanged.
+
+    Args:
+        table_files (dict): The paths of each table.
+        manifest (Manifest): The manifest of the previous runs, or None.
+        silver_format (str): The format of the silver tables.
+        silver_dir (Path): The silver layer directory.
+
+    Returns:
+        set: The tables that can be read back from their silver table.
+    """
+    if manifest is None:
+        return set()
+    return {
+        table
+        for table in PUBLICATION_TABLE_NAMES
+        if is_cached_table(
+            table, table_files.get(table, []), manifest, silver_format, silver_dir
+        )
+    }
+
+
+def load_cached_table(table, file_paths, silver_format, silver_dir):
+    """
+    Read the typed rows of an unchanged table back from its silver table.
+
+    Args:
+        table (str): The name of the table.
+        file_paths (list): The paths of the files of the table.
+        silver_format (str): The format of the silver table.
+        silver_dir (Path): The silver layer directory.
+
+    Returns:
+        tuple: The rows, and the path and row count of each file in row order.
+    """
+    rows = load_silver_records(table, silver_dir, silver_format)
+    # in the order combine_files_by_table_name merged them in
+    counts = {
+        file["path"]: file["valid_rows"]
+        for file in load_silver_files(table, silver_dir, silver_format)
+    }
+    files = [(file, counts[str(file)]) for file in sorted(file_paths, key=str)]
+    return rows, files
+
+
+def save_silver_table(table, rows, files, manifest, silver_format, silver_dir):
+    """
+    Save a table to the silver layer, with the list of files it was built from.
+
+    Args:
+        table (str): The name of the table.
+        rows (list): The rows of the table.
+        files (list): The path and row count of each file, in row order.
+        manifest (Manifest): The manifest holding the content hash of each file, or None.
+        silver_format (str): The format of the silver table.
+        silver_dir (Path): The silver layer directory.
+    """
+    # Without its file list, a table interrupted while written is never reused
+    silver_files_path(table, silver_dir, silver_format).unlink(missing_ok=True)
+    save_silver(rows, table, silver_dir, silver_format)
+    if manifest is not None:
+        save_silver_files(
+            [
+                {
+                    "path": str(file_path),
+                    "hash": manifest.entries[str(file_path)]["hash"],
+                    "valid_rows": count,
+                }
+                for file_path, count in files
+            ],
+            table,
+            silver_dir,
+            silver_format,
+        )
+
+
+def build_publication(table, rows, files, silver_dir):
+    """
+    Load or rebuild the title index of each file of a table, stored next to
+    the silver table, and prepare the table for the drug mention search.
+
+    Args:
+        table (str): The name of the table.
+        rows (list): The rows of the table.
+        files (list): The path and row count of each file, in row order.
+        silver_dir (Path): The silver layer directory, holding the indexes.
+
+    Returns:
+        dict: The rows, table name, search column and title index of the table.
+    """
+    search_column = SCHEMA["search_column"][table]
+    segments = []
+    offset = 0
+    for file_path, count in files:
+        segments.append(
+            load_or_build_index(
+                rows[offset : offset + count],
+                search_column,
+                [file_path],
+                Path(silver_dir) / "index" / f"{get_cache_name(file_path)}.json",
+            )
+        )
+        offset += count
+
+    return {
+        "rows": rows,
+        "table_name": table,
+        "search_column": search_column,
+        "index": SegmentedIndex(segments),
+    }
+
+
+def process_publication(
+    file_paths,
+    batch_size=DEFAULT_BATCH_SIZE,
+    manifest=None,
+    silver_format="arrow",
+    workers=1,
+    silver_dir="data/silver",
+):
+    silver_format = resolve_format(silver_format)
+
+    # Group the files by table once
+    file_paths = list(file_paths)
+    table_files = group_files_by_table_name(file_paths)
+
+    # Tables whose files are all unchanged are read back from their silver table,
+    # the files of the other tables are ingested together in one worker pool, in
+    # the order they were given, largest first when they come from discover_inputs
+    cached_tables = find_cached_tables(table_files, manifest, silver_format, silver_dir)
+    pending = {
+        file
+        for table in PUBLICATION_TABLE_NAMES
+        if table not in cached_tables
+        for file in table_files.get(table, [])
+    }
+    combined_data = combine_files_by_table_name(
+        [file for file in file_paths if file in pending],
+        batch_size,
+        manifest,
+        workers,
+    )
 
-def process_publication(file_paths):
     publications = []
     for table in PUBLICATION_TABLE_NAMES:
-        # search matching files
-        matching_files = [file for file in file_paths if table in file.name]
-        # for file in matching_files, read data and combine
-        combined_data = combine_files_by_table_name(matching_files)
-        # save combined data to bronze folder
-        save_to_json(combined_data[table]["valid_rows"], f"data/silver/{table}.json")
+        if table in cached_tables:
+            # none of the files changed: read the typed rows back from the silver table
+            rows, files = load_cached_table(
+                table, table_files.get(table, []), silver_format, silver_dir
+            )
+        else:
+            table_data = combined_data.get(
+                table, {"valid_rows": [], "invalid_rows": [], "files": []}
+            )
+            rows = table_data["valid_rows"]
+            files = table_data["files"]
+            # save combined data to silver folder
+            save_silver_table(table, rows, files, manifest, silver_format, silver_dir)
 
         # Prepare data for drug mention search
-        data = {
-            "rows": combined_data[table]["valid_rows"],
-            "table_name": table,
-            "search_column": SCHEMA["search_column"][table],
-        }
-        publications.append(data)
+        publications.append(build_publication(table, rows, files, silver_dir))
 
     return publications
@@ -0,0 +1,121 @@
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - depends on the installed extras
+    pa = None
+
+# Strings that Arrow and int() both parse to the same integer
+INTEGER_PATTERN = r"^-?[0-9]+$"
+
+
+def type_error(col, expected_type, value):
+    """Build the error message of a value that does not match its column type"""
+    return f"Incorrect type for column '{col}'. Expected {expected_type}, found {type(value)}."
+
+
+def _convert_strings_to_int(values):
+    """
+    Convert a column of strings to integers at once with Arrow.
+
+    Args:
+        values (list): The string values of the column.
+
+    Returns:
+        list: The converted values, or None if the column has to be converted
+              value by value.
+    """
+    if pa is None:
+        return None
+    array = pa.array(values, type=pa.string())
+    if not pc.all(pc.match_substring_regex(array, INTEGER_PATTERN)).as_py():
+        return None
+    try:
+        return pc.cast(array, pa.int64()).to_pylist()
+    except (pa.ArrowInvalid, OverflowError):
+        return None
+
+
+def convert_column(values, expected_type):
+    """
+    Convert a column of values to the type expected by the schema.
+
+    Columns whose values all have the expected type are kept as is, integer
+    columns made of strings are converted at once with Arrow when it is
+    installed, and the remaining columns are converted value by value.
+    String columns only accept strings; other types accept any value their
+    constructor can convert.
+
+    Args:
+        values (list): The values of the column.
+        expected_type (type): The expected type of the column.
+
+    Returns:
+        tuple: A tuple containing:
+               - converted (list): The converted values, None where conversion failed.
+               - failed (list): The positions of the values that could not be converted.
+    """
+    if all(isinstance(value, expected_type) for value in values):
+        return values, []
+
+    if expected_type is str:
+        failed = [i for i, value in enumerate(values) if not isinstance(value, str)]
+        converted = [None if not isinstance(value, str) else value for value in values]
+        return converted, failed
+
+    if expected_type is int and all(type(value) is str for value in values):
+        converted = _convert_strings_to_int(values)
+        if converted is not None:
+            return converted, []
+
+    converted = []
+    failed = []
+    for i, value in enumerate(values):
+        if isinstance(value, expected_type):
+            converted.append(value)
+            continue
+        try:
+            converted.append(expected_type(value))
+        except (ValueError, TypeError):
+            converted.append(None)
+            failed.append(i)
+    return converted, failed
+
+
+def validate_batch(rows, schema):
+    """
+    Validate and convert a batch of rows against a schema, column by column.
+
+    Args:
+        rows (list): The rows to validate, as dictionaries.
+        schema (dict): A dictionary where keys are column names and values are expected data types.
+
+    Returns:
+        dict: The result of the validation.
+              - 'columns': A dictionary of column name to the list of converted values.
+              - 'valid': A bytearray holding 1 for each valid row and 0 for each invalid row.
+              - 'errors': A dictionary of invalid row position to its error message.
+    """
+    valid = bytearray(b"\x01") * len(rows)
+    errors = {}
+
+    for i, row in enumerate(rows):
+        if len(row) != len(schema):
+            valid[i] = 0
+            errors[i] = (
+                f"Incorrect number of columns. Expected {len(schema)}, found {len(row)}."
+            )
+
+    columns = {}
+    for col, expected_type in schema.items():
+        values = [row.get(col, None) for row in rows]
+        columns[col], failed = convert_column(values, expected_type)
+        for i in failed:
+            if valid[i]:
+                valid[i] = 0
+                errors[i] = type_error(col, expected_type, values[i])
+
+    if errors:
+        logging.debug("Found %d invalid rows out of %d", len(errors), len(rows))
+    return {"columns": columns, "valid": valid, "errors": errors}
@@ -0,0 +1,96 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.async_pipeline import ingest_async, overlap_stages
+from src.manifest import Manifest
+from src.utils.utils import process_publication
+
+
+def _write_publication_shards(test_data_dir):
+    paths = []
+    for shard in (2, 0, 1):
+        path = test_data_dir / f"pubmed_{shard}.csv"
+        path.write_text(f"id,title,date,journal\n{shard},Title {shard},01/01/2020,J\n")
+        paths.append(path)
+    path = test_data_dir / "clinical_trials.csv"
+    path.write_text("id,scientific_title,date,journal\nNCT0,Trial,01/01/2020,J\n")
+    paths.append(path)
+    return paths
+
+
+def test_ingest_async_merges_shards_in_path_order(test_data_dir):
+    """Test files parsed concurrently are merged per table like the sequential ingestion"""
+    paths = _write_publication_shards(test_data_dir)
+
+    publications = asyncio.run(
+        ingest_async(paths, workers=2, queue_size=1, silver_dir=test_data_dir)
+    )
+
+    expected = process_publication(paths, silver_dir=test_data_dir)
+    assert [publication["rows"] for publication in publications] == [
+        publication["rows"] for publication in expected
+    ]
+    assert [publication["search_column"] for publication in publications] == [
+        "scientific_title",
+        "title",
+    ]
+    assert [row.id for row in publications[1]["rows"]] == [0, 1, 2]
+
+
+def test_ingest_async_reads_unchanged_files_from_manifest(test_data_dir):
+    """Test a second ingestion with the manifest reads the unchanged tables back"""
+    paths = _write_publication_shards(test_data_dir)
+    manifest = Manifest(test_data_dir / "manifest.json")
+    first = asyncio.run(ingest_async(paths, manifest=manifest, silver_dir=test_data_dir))
+
+    with patch("src.async_pipeline.process_file") as parse:
+        second = asyncio.run(ingest_async(paths, manifest=manifest, silver_dir=test_data_dir))
+
+    parse.assert_not_called()
+    assert [publication["rows"] for publication in second] == [
+        publication["rows"] for publication in first
+    ]
+
+
+def test_overlap_stages_preserves_order():
+    """Test the consumer gets every item in order through a small queue"""
+    consumed = asyncio.run(overlap_stages(iter(range(100)), list, queue_size=2))
+    assert consumed == list(range(100))
+
+
+def test_overlap_stages_propagates_producer_error():
+    """Test a failing producer fails the consumer before it commits its output"""
+    committed = []
+
+    def produce():
+        yield 1
+        yield 2
+        raise ValueError("matching failed")
+
+    def consume(items):
+        items = list(items)
+        committed.extend(items)
+
+    with pytest.raises(ValueError, match="matching failed"):
+        asyncio.run(overlap_stages(produce(), consume, queue_size=1))
+    assert committed == []
+
+
+def test_overlap_stages_stops_producer_when_consumer_fails():
+    """Test the producer does not block on a full queue once the consumer failed"""
+    produced = []
+
+    def produce():
+        for item in range(1000):
+            produced.append(item)
+            yield item
+
+    def consume(items):
+        next(items)
+        raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        asyncio.run(overlap_stages(produce(), consume, queue_size=1))
+    assert len(produced) < 1000
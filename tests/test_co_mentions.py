@@ -0,0 +1,51 @@
+import pytest
+
+from src.analysis.co_mentions import CoMentionGraph
+
+MENTIONS = [
+    {
+        "drug": "A",
+        "clinical_trials": [{"id": "NCT1", "date": "2020-01-01"}],
+        "pubmed": [{"id": 1, "date": "2020-01-01"}, {"id": 2, "date": "2020-01-01"}],
+        "journal": [{"name": "J1"}, {"name": "J1"}],
+    },
+    {
+        "drug": "B",
+        "clinical_trials": [],
+        "pubmed": [{"id": 1, "date": "2020-01-01"}, {"id": 2, "date": "2020-01-01"}],
+        "journal": [{"name": "J1"}, {"name": "J2"}],
+    },
+    {
+        # Same id as a pubmed article, but a different publication
+        "drug": "C",
+        "clinical_trials": [{"id": 1, "date": "2020-01-01"}],
+        "pubmed": [],
+        "journal": [{"name": "J2"}],
+    },
+]
+
+
+def test_co_mention_counts():
+    """Test co-mention counts by publication and by journal"""
+    graph = CoMentionGraph.from_mentions(MENTIONS)
+    assert graph.to_dict("publication") == {"A": {"B": 2}, "B": {"A": 2}}
+    assert graph.to_dict("journal") == {
+        "A": {"B": 1},
+        "B": {"A": 1, "C": 1},
+        "C": {"B": 1},
+    }
+
+
+def test_neighbours():
+    """Test neighbour queries, with and without the full product"""
+    graph = CoMentionGraph.from_mentions(MENTIONS)
+    assert graph.neighbours("B", "journal") == [("A", 1), ("C", 1)]
+    assert graph.neighbours("B", "journal", top=1) == [("A", 1)]
+    assert graph.neighbours("C") == []
+    assert graph.neighbours("unknown") == []
+
+    graph.co_mentions("publication")
+    assert graph.neighbours("A") == [("B", 2)]
+
+    with pytest.raises(ValueError):
+        graph.neighbours("A", "author")
@@ -0,0 +1,92 @@
+from src.dictionary import DrugDictionary, load_or_build_dictionary
+from src.index import TitleIndex
+from src.records import Drug, Pubmed, Synonym
+from src.transform import find_drug_mentions
+
+
+DRUGS = [Drug("N02BA01", "Aspirin"), Drug("N02BE01", "Paracetamol"), Drug("A01AD", "Vitamin C")]
+
+
+def test_dictionary_compiles_names():
+    """Test the names are normalized and compiled into matchers once"""
+    dictionary = DrugDictionary(DRUGS, "drug")
+    assert dictionary.patterns == ["aspirin", "paracetamol", "vitamin c"]
+    assert dictionary.keys == ["aspirin", "paracetamol", "vitamin"]
+    assert dictionary.matcher.find("Aspirin with VITAMIN C") == {0, 2}
+    assert dictionary.key_matcher.find("vitamins") == {2}
+
+
+def test_dictionary_persistence(test_data_dir):
+    """Test the dictionary is reloaded while its source is unchanged and rebuilt otherwise"""
+    source = test_data_dir / "drugs.csv"
+    source.write_text("atccode,drug\n")
+    dictionary_path = test_data_dir / "drugs.dictionary.pickle"
+    reads = []
+
+    def read_rows():
+        reads.append(1)
+        return DRUGS
+
+    dictionary = load_or_build_dictionary(read_rows, [source], dictionary_path)
+    reloaded = load_or_build_dictionary(read_rows, [source], dictionary_path)
+    assert len(reads) == 1
+    assert reloaded.rows == dictionary.rows
+    assert reloaded.matcher.find("paracetamol") == {1}
+
+    source.write_text("atccode,drug\nN02BA01,Aspirin\n")
+    assert DrugDictionary.load(dictionary_path, [source]) is None
+    load_or_build_dictionary(read_rows, [source], dictionary_path)
+    assert len(reads) == 2
+
+
+def test_dictionary_unreadable(test_data_dir):
+    """Test an unreadable dictionary file is treated as missing"""
+    dictionary_path = test_data_dir / "drugs.dictionary.pickle"
+    dictionary_path.write_bytes(b"not a pickle")
+    assert DrugDictionary.load(dictionary_path, []) is None
+
+
+def test_find_drug_mentions_with_dictionary():
+    """Test the compiled dictionary finds the same mentions as the drug rows"""
+    rows = [
+        Pubmed(1, "Aspirin and vitamin c", "01/01/2020", "Journal A"),
+        Pubmed(2, "Paracetamol alone", "02/01/2020", "Journal B"),
+    ]
+    scanned = {"rows": rows, "search_column": "title", "table_name": "pubmed"}
+    indexed = dict(scanned, index=TitleIndex.build(rows, "title"))
+    drugs = {"rows": DRUGS, "search_column": "drug"}
+    compiled = DrugDictionary(DRUGS, "drug").to_drugs()
+
+    for publication in (scanned, indexed):
+        expected = find_drug_mentions(drugs, [publication], persist_lookups=False)
+        assert find_drug_mentions(compiled, [publication], persist_lookups=False) == expected
+        assert [mention["drug"] for mention in expected] == ["N02BA01", "N02BE01", "A01AD"]
+
+
+def test_synonyms_are_matched_as_their_drug():
+    """Test the mentions of a synonym are merged into the mentions of its drug"""
+    rows = [
+        Pubmed(1, "Benadryl in allergy", "01/01/2020", "Journal A"),
+        Pubmed(2, "Diphenhydramine and BENADRYL", "02/01/2020", "Journal B"),
+        Pubmed(3, "Adrenaline shots", "03/01/2020", "Journal C"),
+    ]
+    drugs = [Drug("A04AD", "DIPHENHYDRAMINE"), Drug("A01AD", "EPINEPHRINE")]
+    synonyms = [
+        Synonym("A04AD", "benadryl"),
+        Synonym("A01AD", "adrenaline"),
+        Synonym("Z99ZZ", "unknown"),
+    ]
+    dictionary = DrugDictionary(drugs, "drug", synonyms=synonyms)
+    assert dictionary.names == ["DIPHENHYDRAMINE", "EPINEPHRINE", "benadryl", "adrenaline"]
+    assert dictionary.drug_ids == [0, 1, 0, 1]
+
+    publication = {"rows": rows, "search_column": "title", "table_name": "pubmed"}
+    indexed = dict(publication, index=TitleIndex.build(rows, "title"))
+    uncompiled = {"rows": drugs, "search_column": "drug", "synonyms": synonyms}
+    for drugs_data in (dictionary.to_drugs(), uncompiled):
+        for table in (publication, indexed):
+            mentions = find_drug_mentions(drugs_data, [table], persist_lookups=False)
+            assert [(m["drug"], [p["id"] for p in m["pubmed"]]) for m in mentions] == [
+                ("A04AD", [1, 2]),
+                ("A01AD", [3]),
+            ]
@@ -0,0 +1,92 @@
+import asyncio
+from unittest.mock import patch
+
+from src.async_pipeline import _feed, ingest_async
+from src.discovery import discover_inputs, iter_input_paths
+from src.utils.constants import PUBLICATION_TABLE_NAMES
+from src.utils.file import combine_files_by_table_name
+from src.utils.utils import process_publication
+
+
+def test_discover_inputs_largest_first(test_data_dir):
+    """Test glob discovery of sharded inputs, with stat info, largest first"""
+    (test_data_dir / "drugs.csv").write_text("atccode,drug\n")
+    (test_data_dir / "pubmed_2020-01-01.csv").write_text("id,title,date,journal\n" + "1,t,01/01/2020,J\n" * 10)
+    (test_data_dir / "pubmed_2020-01-02.csv").write_text("id,title,date,journal\n")
+    (test_data_dir / "pubmed.json").write_text("[]")
+    # Matched by the pubmed pattern but not recognised as the pubmed table
+    (test_data_dir / "pubmedx.csv").write_text("id\n")
+
+    inputs = discover_inputs(
+        test_data_dir,
+        {"drugs": "drugs*.csv", "pubmed": ["pubmed*.csv", "pubmed*.json", "*.json"]},
+    )
+
+    assert [item.path.name for item in inputs] == [
+        "pubmed_2020-01-01.csv",
+        "pubmed_2020-01-02.csv",
+        "drugs.csv",
+        "pubmed.json",
+    ]
+    assert inputs[0].table_name == "pubmed"
+    assert inputs[0].size == (test_data_dir / "pubmed_2020-01-01.csv").stat().st_size
+
+    paths = iter_input_paths(inputs, ["pubmed"])
+    assert next(paths).name == "pubmed_2020-01-01.csv"
+    assert [path.name for path in paths] == ["pubmed_2020-01-02.csv", "pubmed.json"]
+
+
+def _write_shards(test_data_dir):
+    header = {"pubmed": "id,title,date,journal\n", "clinical_trials": "id,scientific_title,date,journal\n"}
+    for name, rows in [
+        ("pubmed_big", 40),
+        ("clinical_trials_mid", 20),
+        ("pubmed_small", 10),
+        ("clinical_trials_tiny", 1),
+    ]:
+        table = "pubmed" if name.startswith("pubmed") else "clinical_trials"
+        (test_data_dir / f"{name}.csv").write_text(
+            header[table] + "".join(f"{i},Title {i},01/01/2020,J\n" for i in range(rows))
+        )
+    return discover_inputs(
+        test_data_dir,
+        {"pubmed": "pubmed*.csv", "clinical_trials": "clinical_trials*.csv"},
+    )
+
+
+def test_process_publication_keeps_discovery_order(test_data_dir):
+    """Test publication files are submitted largest first, across tables"""
+    inputs = _write_shards(test_data_dir)
+    with patch(
+        "src.utils.utils.combine_files_by_table_name", wraps=combine_files_by_table_name
+    ) as combine:
+        publications = process_publication(
+            iter_input_paths(inputs, PUBLICATION_TABLE_NAMES), silver_dir=test_data_dir
+        )
+
+    assert [path.stem for path in combine.call_args[0][0]] == [
+        "pubmed_big",
+        "clinical_trials_mid",
+        "pubmed_small",
+        "clinical_trials_tiny",
+    ]
+    assert [len(publication["rows"]) for publication in publications] == [21, 50]
+
+
+def test_ingest_async_keeps_discovery_order(test_data_dir):
+    """Test the concurrent ingestion feeds publication files largest first, across tables"""
+    inputs = _write_shards(test_data_dir)
+    with patch("src.async_pipeline._feed", wraps=_feed) as feed:
+        publications = asyncio.run(
+            ingest_async(
+                iter_input_paths(inputs, PUBLICATION_TABLE_NAMES), silver_dir=test_data_dir
+            )
+        )
+
+    assert [path.stem for path in feed.call_args[0][0]] == [
+        "pubmed_big",
+        "clinical_trials_mid",
+        "pubmed_small",
+        "clinical_trials_tiny",
+    ]
+    assert [len(publication["rows"]) for publication in publications] == [21, 50]
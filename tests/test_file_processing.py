@@ -1,6 +1,14 @@
-from src.utils.file import process_file, get_encoding, is_csv, is_json, check_row
+from src.utils.file import atomic_write, process_file, get_encoding, is_csv, is_json, check_row, iter_file, iter_json_array, detect_encoding, save_to_json, combine_files_by_table_name
+from src.utils.lenient_json import ValueScanner, scan_value
+from src.utils.validation import validate_batch
+from src.records import Drug
 from src.utils.constants import SCHEMA
+import io
+import stat
+import json
+import codecs
 import pytest
+from unittest.mock import patch
 from pathlib import Path
 
 def test_process_csv_file(sample_csv_file):
@@ -55,3 +63,132 @@ def test_check_row_invalid():
     is_valid, error = check_row(schema, row)
     assert is_valid is False
     assert error is not None
+
+def test_iter_file_chunks(sample_csv_file):
+    """Test streaming a file in chunks of the batch size"""
+    chunks = list(iter_file(sample_csv_file, batch_size=1))
+    assert len(chunks) == 2
+    assert all(len(chunk["valid_rows"]) == 1 for chunk in chunks)
+
+def test_iter_json_array_trailing_comma():
+    """Test incremental parsing of a JSON array with a trailing comma"""
+    content = io.StringIO('\t[{"id": 1}, {"id": "2", "title": "a, ]"},\n]')
+    assert list(iter_json_array(content, block_size=4)) == [
+        {"id": 1},
+        {"id": "2", "title": "a, ]"},
+    ]
+
+def test_validate_batch_coerces_columns():
+    """Test batch validation converts columns and flags invalid rows"""
+    rows = [
+        {"id": "1", "title": "a", "date": "2020-01-01", "journal": "J"},
+        {"id": "x", "title": "b", "date": "2020-01-01", "journal": "J"},
+        {"id": 3, "title": "c", "date": "2020-01-01"},
+    ]
+    result = validate_batch(rows, SCHEMA["pubmed"])
+    assert result["columns"]["id"] == [1, None, 3]
+    assert list(result["valid"]) == [1, 0, 0]
+    assert "'id'" in result["errors"][1]
+    assert "number of columns" in result["errors"][2]
+
+def test_detect_encoding_fast_paths():
+    """Test BOM and UTF-8 samples are detected without statistical detection"""
+    assert detect_encoding(codecs.BOM_UTF8 + b"id,title") == "utf-8-sig"
+    assert detect_encoding(codecs.BOM_UTF16_LE + "id".encode("utf-16-le")) == "utf-16"
+    assert detect_encoding("Hôpitaux".encode("utf-8")[:2]) == "utf-8"
+    assert detect_encoding("Genève".encode("utf-8")) == "utf-8"
+
+def test_process_file_with_bom(test_data_dir):
+    """Test reading a CSV file starting with a byte order mark"""
+    file_path = test_data_dir / "drugs.csv"
+    file_path.write_bytes(codecs.BOM_UTF8 + "atccode,drug\nA01,Aspirin\n".encode("utf-8"))
+    assert process_file(file_path)["valid_rows"] == [Drug("A01", "Aspirin")]
+
+def test_iter_json_array_repairs_nested_trailing_commas():
+    """Test nested trailing commas are removed and reported with byte offsets"""
+    content = '[{"title": "é", "ids": [1, 2,],}, {"id": 123456}]'
+    repairs = []
+    rows = list(iter_json_array(io.StringIO(content), block_size=5, encoding="utf-8", repairs=repairs))
+    assert rows == [{"title": "é", "ids": [1, 2]}, {"id": 123456}]
+    raw = content.encode("utf-8")
+    assert [raw[repair["offset"]:repair["offset"] + 1] for repair in repairs] == [b",", b","]
+    assert [repair["offset"] for repair in repairs] == [29, 31]
+
+@pytest.mark.parametrize("block_size", range(1, 12))
+def test_iter_json_array_block_boundaries(block_size):
+    """Test numbers, strings and repaired values split at every block boundary"""
+    content = ' [1, 2.5, -3e+2, "a\\"b", [1, 2,], {"x": [true, null],}, 1e21,]'
+    repairs = []
+    rows = list(iter_json_array(io.StringIO(content), block_size, "utf-8", repairs))
+    assert rows == [1, 2.5, -300.0, 'a"b', [1, 2], {"x": [True, None]}, 1e21]
+    raw = content.encode("utf-8")
+    assert {raw[repair["offset"]:repair["offset"] + 1] for repair in repairs} == {b","}
+    assert len(repairs) == 3
+
+def test_value_scanner_resumes_across_blocks():
+    """Test scanning a value given in blocks visits each character once"""
+    text = '[{"a": "],", "b": [1,],}, 2,]'
+    scanner = ValueScanner(0)
+    assert scanner.scan(text[:9]) is None
+    assert scanner.position == 9
+    # The first characters are discarded when the next block is read
+    scanner.shift(1)
+    assert scanner.scan(text[1:]) == len(text) - 1
+    assert scanner.commas == [19, 21, 26]
+    assert scan_value(text, 0) == (len(text), [20, 22, 27])
+
+def test_iter_json_array_number_split_after_decimal_point():
+    """Test a number split right after its decimal point at the default block size"""
+    content = " [" + "1," * 32766 + "3.25, 4]"
+    rows = list(iter_json_array(io.StringIO(content)))
+    assert rows[-2:] == [3.25, 4]
+    assert len(rows) == 32768
+
+@pytest.mark.parametrize("output_format", ["json", "compact", "ndjson"])
+def test_save_to_json_streams_generators(test_data_dir, output_format):
+    """Test saving a generator in each output format"""
+    output_file = test_data_dir / "out.json"
+    save_to_json(({"drug": str(i)} for i in range(3)), output_file, output_format=output_format)
+    content = output_file.read_text()
+    if output_format == "ndjson":
+        assert [json.loads(line) for line in content.splitlines()] == [{"drug": "0"}, {"drug": "1"}, {"drug": "2"}]
+    else:
+        assert json.loads(content) == [{"drug": "0"}, {"drug": "1"}, {"drug": "2"}]
+    assert list(test_data_dir.glob(".out.json.*")) == []
+
+
+def test_combine_files_in_parallel(test_data_dir):
+    """Test files parsed in a worker pool are merged per table in path order"""
+    paths = []
+    for shard in range(3):
+        path = test_data_dir / f"pubmed_{shard}.csv"
+        path.write_text(f"id,title,date,journal\n{shard},Title {shard},01/01/2020,J\nbad,Title,01/01/2020,J\n")
+        paths.append(path)
+    drugs_path = test_data_dir / "drugs.csv"
+    drugs_path.write_text("atccode,drug\nA01AD,EPINEPHRINE\n")
+    paths.append(drugs_path)
+
+    sequential = combine_files_by_table_name(paths)
+    parallel = combine_files_by_table_name(paths, workers=2)
+
+    assert parallel == sequential
+    assert [row["id"] for row in parallel["pubmed"]["valid_rows"]] == [0, 1, 2]
+    assert len(parallel["pubmed"]["invalid_rows"]) == 3
+    assert parallel["pubmed"]["files"] == [(path, 1) for path in paths[:3]]
+    assert parallel["drugs"]["files"] == [(drugs_path, 1)]
+
+
+def test_save_to_json_file_mode(test_data_dir):
+    """Test atomically written files get the mode of files created by open()"""
+    created_path = test_data_dir / "created.json"
+    created_path.touch()
+    output_path = test_data_dir / "mentions.json"
+    # The umask is not changed while writing, even for a moment
+    with patch("os.umask") as umask:
+        save_to_json([{"drug": "A04AD"}], output_path)
+    umask.assert_not_called()
+    assert stat.S_IMODE(output_path.stat().st_mode) == stat.S_IMODE(created_path.stat().st_mode)
+
+    with atomic_write(output_path, mode=0o640) as file:
+        file.write("[]")
+    assert stat.S_IMODE(output_path.stat().st_mode) == 0o640
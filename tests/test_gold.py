@@ -0,0 +1,78 @@
+from datetime import date
+
+import pytest
+from src.utils.gold import MentionReader, MentionTimeIndex, index_path, save_ndjson_with_index
+from src.analysis.journal_stats import load_json_data
+
+
+MENTIONS = [
+    {"drug": "A04AD", "pubmed": [{"id": 1, "date": "01/01/2019", "day": date(2019, 1, 1).toordinal()}], "journal": [{"name": "Hôpitaux", "date": "01/01/2019"}]},
+    {"drug": "S03AA", "pubmed": [{"id": 4, "date": "01/01/2020", "day": date(2020, 1, 1).toordinal()}], "journal": [{"name": "J", "date": "01/01/2020"}]},
+]
+
+
+def test_mention_reader_random_access(test_data_dir):
+    """Test looking up one drug in an NDJSON gold file through its index"""
+    output_file = test_data_dir / "drug_mentions.ndjson"
+    save_ndjson_with_index(iter(MENTIONS), output_file)
+
+    with MentionReader(output_file) as reader:
+        assert len(reader) == 2
+        assert reader.get("S03AA") == MENTIONS[1]
+        assert reader.get("A04AD") == MENTIONS[0]
+        assert reader.get("R01AD") is None
+    assert load_json_data(output_file) == MENTIONS
+
+
+def test_mention_reader_shared_atccode(test_data_dir):
+    """Test drugs sharing an ATC code are all indexed"""
+    output_file = test_data_dir / "drug_mentions.ndjson"
+    shared = {"drug": "A04AD", "pubmed": [{"id": 7, "date": "01/01/2021"}], "journal": [{"name": "K", "date": "01/01/2021"}]}
+    offsets = save_ndjson_with_index(MENTIONS + [shared], output_file)
+    assert len(offsets["A04AD"]) == 2
+
+    with MentionReader(output_file) as reader:
+        assert len(reader) == 2
+        assert reader.get("A04AD") == MENTIONS[0]
+        assert reader.get_all("A04AD") == [MENTIONS[0], shared]
+        assert reader.get_all("R01AD") == []
+
+
+def test_mention_reader_stale_index(test_data_dir):
+    """Test an index that does not match its gold file is rejected"""
+    output_file = test_data_dir / "drug_mentions.ndjson"
+    save_ndjson_with_index(MENTIONS, output_file)
+    with open(output_file, "a") as f:
+        f.write("\n")
+    assert index_path(output_file).exists()
+    with pytest.raises(ValueError):
+        MentionReader(output_file)
+
+
+def test_mention_time_index_range_queries(test_data_dir):
+    """Test date range queries on the month partitions of the mentions"""
+    mentions = MENTIONS + [
+        {
+            "drug": "A04AD",
+            "clinical_trials": [
+                {"id": "NCT1", "date": "1 January 2020", "day": date(2020, 1, 1).toordinal()},
+                {"id": "NCT2", "date": "bad", "day": None},
+            ],
+            "pubmed": [{"id": 5, "date": "2019-01-31", "day": date(2019, 1, 31).toordinal()}],
+        }
+    ]
+    index = MentionTimeIndex()
+    assert list(index.track(iter(mentions))) == mentions
+    assert index.undated == 1
+
+    output_file = test_data_dir / "mention_time_index.json"
+    index.save(output_file)
+    loaded = MentionTimeIndex.load(output_file)
+
+    assert [m["id"] for m in loaded.query("A04AD")] == [1, 5, "NCT1"]
+    assert [m["id"] for m in loaded.query("A04AD", "02/01/2019", "2020-01-01")] == [5, "NCT1"]
+    assert [m["id"] for m in loaded.query("A04AD", end="31/01/2019")] == [1, 5]
+    assert loaded.query("S03AA", "2020-01-02") == []
+    assert loaded.query("missing") == []
+    with pytest.raises(ValueError):
+        loaded.query("A04AD", "not a date")
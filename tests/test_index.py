@@ -0,0 +1,28 @@
+from src.index import TitleIndex, load_or_build_index
+
+
+ROWS = [
+    {"title": "Study of Aspirin"},
+    {"title": "Aspirin and paracetamol combined"},
+    {"title": "Unrelated"},
+]
+
+
+def test_index_lookup():
+    """Test looking up names, including names with whitespace, in the index"""
+    index = TitleIndex.build(ROWS, "title")
+    result = index.lookup(["aspirin", "PIRIN", "and paracetamol", "Ibuprofen"], ROWS, "title")
+    assert result == [[0, 1], [0, 1], [1], []]
+
+
+def test_index_persistence(test_data_dir):
+    """Test the index is reloaded while its source is unchanged and rebuilt otherwise"""
+    source = test_data_dir / "pubmed.csv"
+    source.write_text("id,title\n")
+    index_path = test_data_dir / "pubmed_index.json"
+
+    index = load_or_build_index(ROWS, "title", [source], index_path)
+    assert TitleIndex.load(index_path, [source]).postings == index.postings
+
+    source.write_text("id,title,date\n")
+    assert TitleIndex.load(index_path, [source]) is None
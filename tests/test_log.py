@@ -0,0 +1,36 @@
+import logging
+
+from src.utils.log import ProgressLogger, setup_queue_logging, stop_queue_logging
+
+
+def test_progress_logger_aggregates_records(caplog):
+    """Test progress is logged every N items and once at the end, not per item"""
+    caplog.set_level(logging.INFO)
+    progress = ProgressLogger("Processed drugs", every=2, interval=3600, total=5)
+    assert list(progress.track(range(5))) == list(range(5))
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 3
+    assert messages[0].startswith("Processed drugs: 2/5 items")
+    assert messages[-1].startswith("Processed drugs: 5/5 items")
+
+
+def test_progress_logger_disabled_level(caplog):
+    """Test updates do not log below the configured level"""
+    caplog.set_level(logging.INFO)
+    progress = ProgressLogger("Validated rows", every=1, level=logging.DEBUG)
+    progress.update(10)
+    progress.done()
+    assert progress.count == 10
+    assert not caplog.records
+
+
+def test_queue_logging_writes_from_listener(test_data_dir):
+    """Test records queued by the handler reach the log file"""
+    log_file = test_data_dir / "logs" / "pipeline.log"
+    setup_queue_logging("INFO", "%(levelname)s - %(message)s", str(log_file))
+    try:
+        logging.info("queued %s", "record")
+    finally:
+        stop_queue_logging()
+    assert "INFO - queued record" in log_file.read_text()
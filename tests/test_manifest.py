@@ -0,0 +1,84 @@
+from src.manifest import Manifest
+from src.transform import find_drug_mentions
+from src.utils.utils import process_publication
+
+
+def test_manifest_skips_unchanged_files(sample_csv_file, test_data_dir):
+    """Test unchanged files are read from the cache and changed files are parsed again"""
+    manifest = Manifest(test_data_dir / "manifest.json")
+    result = manifest.process_file(sample_csv_file)
+    assert len(result["valid_rows"]) == 2
+    manifest.save()
+
+    manifest = Manifest(test_data_dir / "manifest.json")
+    assert manifest.is_unchanged(sample_csv_file)
+    assert manifest.process_file(sample_csv_file) == result
+
+    with open(sample_csv_file, "a") as f:
+        f.write("Ibuprofen,M01AE01\n")
+    assert not manifest.is_unchanged(sample_csv_file)
+    assert len(manifest.process_file(sample_csv_file)["valid_rows"]) == 3
+    assert manifest.entries[str(sample_csv_file)]["valid_rows"] == 3
+
+
+def test_manifest_same_named_shards(test_data_dir):
+    """Test files with the same name in different directories get their own cache"""
+    paths = []
+    for shard in ("a", "b"):
+        path = test_data_dir / shard / "drugs.csv"
+        path.parent.mkdir()
+        path.write_text(f"atccode,drug\n{shard.upper()}01,DRUG {shard}\n")
+        paths.append(path)
+
+    manifest = Manifest(test_data_dir / "manifest.json")
+    results = [manifest.process_file(path) for path in paths]
+    assert manifest.entries[str(paths[0])]["cache"] != manifest.entries[str(paths[1])]["cache"]
+    manifest.save()
+
+    manifest = Manifest(test_data_dir / "manifest.json")
+    for path, result in zip(paths, results):
+        assert manifest.is_unchanged(path)
+        assert manifest.process_file(path) == result
+
+
+def _ingest_shards(test_data_dir, shards):
+    """Ingest pubmed shards with a manifest, and find the ids mentioning each drug"""
+    paths = [test_data_dir / f"pubmed-{shard}.csv" for shard in shards]
+    manifest = Manifest(test_data_dir / "manifest.json")
+    publications = process_publication(paths, manifest=manifest, silver_dir=test_data_dir)
+    manifest.save()
+    drugs = {
+        "rows": [{"atccode": "A01", "drug": "ASPIRIN"}, {"atccode": "B01", "drug": "BETA"}],
+        "search_column": "drug",
+    }
+    return {
+        mention["drug"]: sorted(publication["id"] for publication in mention["pubmed"])
+        for mention in find_drug_mentions(drugs, publications, persist_lookups=False)
+    }
+
+
+def _write_shards(test_data_dir):
+    (test_data_dir / "pubmed-0.csv").write_text(
+        "id,title,date,journal\n100,Aspirin,01/01/2020,J\n101,Aspirin and beta,01/01/2020,J\n"
+    )
+    (test_data_dir / "pubmed-1.csv").write_text(
+        "id,title,date,journal\n1,Aspirin,01/01/2020,J\n2,Beta,01/01/2020,J\n"
+    )
+
+
+def test_cached_table_not_reused_after_removing_a_shard(test_data_dir):
+    """Test a table is ingested again when one of its files is removed"""
+    _write_shards(test_data_dir)
+    assert _ingest_shards(test_data_dir, [0, 1]) == {"A01": [1, 100, 101], "B01": [2, 101]}
+
+    (test_data_dir / "pubmed-0.csv").unlink()
+    assert _ingest_shards(test_data_dir, [1]) == {"A01": [1], "B01": [2]}
+
+
+def test_cached_table_not_reused_after_adding_a_shard(test_data_dir):
+    """Test a table is ingested again when a file is added to it"""
+    _write_shards(test_data_dir)
+    assert _ingest_shards(test_data_dir, [1]) == {"A01": [1], "B01": [2]}
+    assert _ingest_shards(test_data_dir, [1]) == {"A01": [1], "B01": [2]}
+
+    assert _ingest_shards(test_data_dir, [0, 1]) == {"A01": [1, 100, 101], "B01": [2, 101]}
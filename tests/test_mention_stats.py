@@ -0,0 +1,70 @@
+from datetime import date
+
+from src.analysis.journal_stats import analyze_journal_mentions
+from src.analysis.mention_stats import MentionStats, date_bucket
+from src.utils.dates import parse_date
+
+JANUARY_2019 = date(2019, 1, 1).toordinal()
+JANUARY_2020 = date(2020, 1, 1).toordinal()
+
+MENTIONS = [
+    {
+        "drug": "A04AD",
+        "clinical_trials": [{"id": "NCT1", "date": "1 January 2020", "day": JANUARY_2020}],
+        "pubmed": [
+            {"id": 1, "date": "01/01/2019", "day": JANUARY_2019},
+            {"id": 2, "date": "2020-01-01", "day": JANUARY_2020},
+        ],
+        "journal": [{"name": "Journal A", "date": "01/01/2019"}],
+    },
+    {
+        "drug": "S03AA",
+        "clinical_trials": [],
+        "pubmed": [{"id": 3, "date": "not a date", "day": None}],
+        "journal": [{"name": "Journal B", "date": "01/01/2019"}, {"name": "Journal A"}],
+    },
+    {"drug": "V03AB", "clinical_trials": [], "pubmed": [], "journal": [{"name": "Journal B"}]},
+]
+
+
+def test_date_bucket():
+    """Test month buckets of the day numbers parsed at ingest"""
+    assert date_bucket(date(2019, 2, 1).toordinal()) == "2019-02"
+    assert date_bucket(parse_date("25 May 2020")) == "2020-05"
+    assert date_bucket(parse_date("32 Smarch 2020")) == "unknown"
+
+
+def test_mention_stats_single_pass():
+    """Test statistics accumulated while the mentions flow through"""
+    stats = MentionStats()
+    assert list(stats.track(iter(MENTIONS))) == MENTIONS
+
+    assert stats.journal_counts() == {"Journal A": 2, "Journal B": 2}
+    assert stats.top_journals(1) == [
+        {"name": "Journal A", "drug_count": 2, "drugs": ["A04AD", "S03AA"]}
+    ]
+    assert stats.drug_stats["A04AD"] == {"journal_count": 1, "mention_count": 3}
+    assert stats.drug_stats["V03AB"] == {"journal_count": 1, "mention_count": 0}
+    assert stats.to_dict()["date_buckets"] == {"2019-01": 1, "2020-01": 2, "unknown": 1}
+
+
+def test_analyze_journal_mentions_uses_first_seen_on_ties():
+    """Test that the top journal matches the previous max() tie-breaking"""
+    result = analyze_journal_mentions(MENTIONS)
+    assert result["name"] == "Journal A"
+    assert analyze_journal_mentions([{"drug": "X", "journal": []}]) is None
+
+
+def test_mention_stats_shared_atccode():
+    """Test drugs sharing an ATC code count as one drug of a journal"""
+    stats = MentionStats()
+    shared = {"drug": "A04AD", "pubmed": [], "journal": [{"name": "Journal A"}, {"name": "Journal B"}]}
+    for mention in MENTIONS + [shared]:
+        stats.observe(mention)
+
+    assert stats.observed == 4
+    assert stats.drug_codes == ["A04AD", "S03AA", "V03AB"]
+    assert stats.journal_counts() == {"Journal A": 2, "Journal B": 3}
+    assert stats.top_journals(1)[0]["drugs"] == ["A04AD", "S03AA", "V03AB"]
+    # Journal A mentions both drugs of the code and is counted once
+    assert stats.drug_stats["A04AD"] == {"journal_count": 2, "mention_count": 3}
@@ -0,0 +1,39 @@
+import json
+import pstats
+
+from src.utils.metrics import RunMetrics
+
+
+def test_stage_metrics_and_exports(test_data_dir):
+    """Test per-stage metrics in the JSON report and the Prometheus text format"""
+    metrics = RunMetrics("pipeline", profile=True, trace_memory=True)
+    metrics.start()
+    with metrics.stage("ingest") as counters:
+        data = [str(i) for i in range(1000)]
+        counters["rows"] = len(data)
+    metrics.count("ingest", bytes_read=10)
+    metrics.count("ingest", bytes_read=5)
+    metrics.set_gauge("matcher_hit_rate", 0.5)
+    metrics.finish()
+
+    report = metrics.to_dict()
+    stage = report["stages"]["ingest"]
+    assert stage["counters"] == {"rows": 1000, "bytes_read": 15}
+    assert stage["wall_seconds"] > 0 and stage["rows_per_second"] > 0
+    assert stage["peak_traced_bytes"] > 0
+    assert report["gauges"] == {"matcher_hit_rate": 0.5}
+
+    text = metrics.to_prometheus()
+    assert "# TYPE pipeline_stage_rows gauge" in text
+    assert 'pipeline_stage_bytes_read{run="pipeline",stage="ingest"} 15' in text
+    assert 'pipeline_matcher_hit_rate{run="pipeline"} 0.5' in text
+
+    metrics.save(
+        test_data_dir / "report.json",
+        test_data_dir / "metrics.prom",
+        test_data_dir / "run.prof",
+    )
+    with open(test_data_dir / "report.json") as f:
+        assert json.load(f)["stages"]["ingest"]["counters"]["rows"] == 1000
+    assert "pipeline_stage_rows{run=\"pipeline\",stage=\"ingest\"} 1000" in (test_data_dir / "metrics.prom").read_text()
+    assert pstats.Stats(str(test_data_dir / "run.prof")).total_calls > 0
@@ -1,4 +1,7 @@
-from pipeline import main, validate_input_files, process_drugs, setup_logging
+import pytest
+from pipeline import main, validate_input_files, process_drugs, record_matcher_gauges, setup_logging
+from src.analysis.mention_stats import MentionStats
+from src.utils.metrics import RunMetrics
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 from src.config.config import Config
@@ -30,7 +33,7 @@ def test_process_drugs_success(mock_process_file):
 def test_process_drugs_with_retry(mock_process_file):
     """Test drug processing with retry mechanism"""
     mock_process_file.side_effect = [
-        ValueError("Temporary error"),
+        OSError("Temporary error"),
         {
             "valid_rows": [{"drug": "Aspirin", "atccode": "N02BA01"}],
             "invalid_rows": []
@@ -41,6 +44,15 @@ def test_process_drugs_with_retry(mock_process_file):
     assert "rows" in result
     assert mock_process_file.call_count == 2
 
+@patch("pipeline.process_file")
+def test_process_drugs_fails_fast_on_parse_error(mock_process_file):
+    """Test deterministic errors are not retried"""
+    mock_process_file.side_effect = ValueError("Unsupported file type")
+
+    with pytest.raises(ValueError):
+        process_drugs(Path("test.csv"))
+    assert mock_process_file.call_count == 1
+
 
 @patch("pipeline.process_publication")
 @patch("pipeline.process_drugs")
@@ -76,3 +88,13 @@ def test_main_input_validation_failure(config_file):
         mock_validate.return_value = False
         main()
         mock_validate.assert_called_once()
+
+
+def test_record_matcher_gauges():
+    """Test the hit rate is the share of the input drugs that are mentioned"""
+    stats = MentionStats()
+    stats.observe({"drug": "A04AD", "pubmed": [{"id": 1, "date": "01/01/2019"}], "journal": [{"name": "J"}]})
+    metrics = RunMetrics("pipeline")
+
+    record_matcher_gauges(metrics, stats, 4)
+    assert metrics.gauges == {"matcher_drugs": 4, "matcher_mentions": 1, "matcher_hit_rate": 0.25}
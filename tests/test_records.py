@@ -0,0 +1,51 @@
+from datetime import date
+from unittest.mock import patch
+
+from src.records import Pubmed, records_from_columns, to_records
+
+
+def test_records_are_compact_and_readable_by_column():
+    """Test records have no per-row dictionary and support column access"""
+    record = to_records([{"id": 1, "title": "t", "date": "01/01/2019", "journal": "J"}], "pubmed")[0]
+    assert not hasattr(record, "__dict__")
+    assert record["title"] == "t"
+    assert record.get("missing") is None
+    assert record.to_dict() == {"id": 1, "title": "t", "date": "01/01/2019", "journal": "J"}
+
+
+def test_records_intern_repeated_strings():
+    """Test journal and date values are shared between records"""
+    columns = {
+        "id": [1, 2],
+        "title": ["a", "b"],
+        "date": ["".join(["01/01/", "2019"]), "".join(["01/01/", "2019"])],
+        "journal": ["".join(["Jour", "nal"]), "".join(["Jour", "nal"])],
+    }
+    first, second = records_from_columns(columns, "pubmed")
+    assert first.journal is second.journal
+    assert first.date is second.date
+    assert first == Pubmed(1, "a", "01/01/2019", "Journal")
+
+
+def test_publication_dates_are_parsed_once_into_day_numbers():
+    """Test publication records carry the day number of their date"""
+    first, second, invalid = to_records(
+        [
+            {"id": 1, "title": "t", "date": "25/05/2020", "journal": "J"},
+            {"id": 2, "title": "t", "date": "2020-05-25", "journal": "J"},
+            {"id": 3, "title": "t", "date": "31/02/2020", "journal": "J"},
+        ],
+        "pubmed",
+    )
+    assert first.day == second.day == date(2020, 5, 25).toordinal()
+    assert invalid.day is None
+    assert "day" not in first.keys()
+
+
+def test_publication_day_numbers_are_not_parsed_again():
+    """Test records built from stored day numbers keep them"""
+    columns = {"id": [1], "title": ["t"], "date": ["25/05/2020"], "journal": ["J"], "day": [42]}
+    with patch("src.records.parse_date") as parse:
+        (record,) = records_from_columns(columns, "pubmed")
+    parse.assert_not_called()
+    assert record.day == 42
@@ -0,0 +1,72 @@
+import asyncio
+import errno
+import pytest
+
+from src.utils import retry
+from src.utils.retry import configure_retries, is_transient, retry_on_error
+
+
+@pytest.fixture(autouse=True)
+def retry_settings():
+    """Restore the retry settings and budget after each test"""
+    settings = dict(retry.RETRY_SETTINGS)
+    yield
+    retry.RETRY_SETTINGS.update(settings)
+    configure_retries({})
+
+
+def flaky(errors):
+    """Return a function raising the given errors, then returning 'ok'"""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return func, calls
+
+
+def test_error_classification():
+    """Test transient I/O errors are told apart from permanent errors"""
+    assert is_transient(OSError(errno.EIO, "I/O error"))
+    assert is_transient(TimeoutError())
+    assert not is_transient(FileNotFoundError())
+    assert not is_transient(ValueError("bad row"))
+
+
+def test_retries_transient_errors_with_backoff(monkeypatch):
+    """Test transient errors are retried with growing, jittered delays"""
+    delays = []
+    monkeypatch.setattr(retry.time, "sleep", delays.append)
+    configure_retries({"retry_delay": 1, "retry_backoff": 2, "retry_max_delay": 3})
+
+    func, calls = flaky([TimeoutError(), TimeoutError(), TimeoutError()])
+    assert retry_on_error(max_retries=4)(func)() == "ok"
+    assert len(calls) == 4
+    assert 0 <= delays[0] <= 1 and 0 <= delays[1] <= 2 and 0 <= delays[2] <= 3
+
+
+def test_retry_budget_is_shared(monkeypatch):
+    """Test retries stop once the run's budget is spent"""
+    monkeypatch.setattr(retry.time, "sleep", lambda delay: None)
+    configure_retries({"retry_budget": 1})
+
+    func, calls = flaky([OSError("stale handle"), OSError("stale handle")])
+    with pytest.raises(OSError):
+        retry_on_error(max_retries=5)(func)()
+    assert len(calls) == 2
+
+
+def test_retries_coroutines():
+    """Test the decorator on coroutine functions"""
+    configure_retries({"retry_delay": 0})
+    func, calls = flaky([ConnectionError()])
+
+    @retry_on_error()
+    async def fetch():
+        return func()
+
+    assert asyncio.run(fetch()) == "ok"
+    assert len(calls) == 2
@@ -0,0 +1,55 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.request import urlopen
+
+import pytest
+
+from src.config.config import Config
+from src.service import MentionService, make_handler
+
+
+@pytest.fixture(scope="module")
+def service():
+    """A mention service loaded from the bronze files of the repository"""
+    service = MentionService(Config())
+    service.load()
+    return service
+
+
+def test_queries(service):
+    """Test known drugs by ATC code and ad-hoc names"""
+    with open("data/gold/drug_mentions.json") as f:
+        gold = {mention["drug"]: mention for mention in json.load(f)}
+
+    assert service.query_code("A04AD") == gold["A04AD"]
+    by_name = service.query_name("Diphenhydramine")
+    assert by_name["pubmed"] == gold["A04AD"]["pubmed"]
+    assert service.query_name("not a drug name") is None
+    assert service.query_code("UNKNOWN") is None
+
+
+def test_reload_if_changed(service):
+    """Test the state is only reloaded when the bronze files change"""
+    assert service.reload_if_changed() is False
+    service.state["fingerprint"] = ()
+    assert service.reload_if_changed() is True
+    assert service.state["fingerprint"]
+
+
+def test_http_api(service):
+    """Test the HTTP routes of the service"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urlopen(f"{base}/mentions?name=tetracycline") as response:
+            body = json.load(response)
+        assert body["query"] == {"name": "tetracycline"}
+        assert body["mentions"]["drug"] == "tetracycline"
+        with urlopen(f"{base}/health") as response:
+            assert json.load(response)["status"] == "ok"
+    finally:
+        server.shutdown()
+        server.server_close()
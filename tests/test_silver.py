@@ -0,0 +1,66 @@
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from src.records import to_records
+from src.utils.silver import coerce_rows, load_silver, load_silver_records, save_silver
+
+
+ROWS = [
+    {"id": "1", "title": "Study of Aspirin", "date": "01/01/2019", "journal": "J1"},
+    {"id": 2, "title": "Paracetamol", "date": "2020-01-01", "journal": "J2"},
+]
+
+
+def test_coerce_rows():
+    """Test rows are converted to the schema types"""
+    assert [row["id"] for row in coerce_rows(ROWS, "pubmed")] == [1, 2]
+
+
+@pytest.mark.parametrize("silver_format", ["arrow", "json"])
+def test_silver_roundtrip(test_data_dir, silver_format):
+    """Test saving and loading a silver table with typed columns"""
+    if silver_format == "arrow":
+        pytest.importorskip("pyarrow")
+    save_silver(ROWS, "pubmed", test_data_dir, silver_format)
+    assert load_silver("pubmed", test_data_dir, silver_format) == coerce_rows(ROWS, "pubmed")
+    assert load_silver("pubmed", test_data_dir, silver_format, ["id", "date"]) == [
+        {"id": 1, "date": "01/01/2019"},
+        {"id": 2, "date": "2020-01-01"},
+    ]
+
+
+@pytest.mark.parametrize("silver_format", ["arrow", "json"])
+def test_silver_records_column_subset(test_data_dir, silver_format):
+    """Test loading the records of a silver table, with only some of its columns"""
+    if silver_format == "arrow":
+        pytest.importorskip("pyarrow")
+    save_silver(ROWS, "pubmed", test_data_dir, silver_format)
+    records = load_silver_records("pubmed", test_data_dir, silver_format)
+    assert records == to_records(coerce_rows(ROWS, "pubmed"), "pubmed")
+
+    records = load_silver_records("pubmed", test_data_dir, silver_format, ["id", "title"])
+    assert [(record["id"], record["title"], record["journal"]) for record in records] == [
+        (1, "Study of Aspirin", None),
+        (2, "Paracetamol", None),
+    ]
+
+
+@pytest.mark.parametrize("silver_format", ["arrow", "json"])
+def test_silver_records_keep_day_numbers(test_data_dir, silver_format):
+    """Test the day numbers parsed at ingest are stored and read back with the rows"""
+    if silver_format == "arrow":
+        pytest.importorskip("pyarrow")
+    save_silver(to_records(ROWS, "pubmed"), "pubmed", test_data_dir, silver_format)
+    assert [row["day"] for row in load_silver("pubmed", test_data_dir, silver_format)] == [
+        date(2019, 1, 1).toordinal(),
+        date(2020, 1, 1).toordinal(),
+    ]
+
+    with patch("src.records.parse_date") as parse:
+        records = load_silver_records("pubmed", test_data_dir, silver_format)
+    parse.assert_not_called()
+    assert [record.day for record in records] == [
+        date(2019, 1, 1).toordinal(),
+        date(2020, 1, 1).toordinal(),
+    ]
@@ -0,0 +1,123 @@
+from datetime import date
+
+import pytest
+
+from src.dictionary import DrugDictionary
+from src.matcher import DrugMatcher, match_texts
+from src.records import to_records
+from src.transform import find_drug_mentions
+from src.utils.text import normalize_text
+
+
+def test_matcher_finds_all_names():
+    """Test matching several names in a single pass"""
+    matcher = DrugMatcher(["Aspirin", "Paracetamol", "pirin"])
+    assert matcher.find("Aspirin versus PARACETAMOL") == {0, 1, 2}
+    assert matcher.find("Ibuprofen") == set()
+
+
+def test_matcher_overlapping_names():
+    """Test matching names that share prefixes and suffixes"""
+    matcher = DrugMatcher(["he", "she", "his", "hers"])
+    assert matcher.find("ushers") == {0, 1, 3}
+
+
+def test_find_drug_mentions():
+    """Test finding drug mentions across publication tables"""
+    drugs = {
+        "rows": [
+            {"drug": "ASPIRIN", "atccode": "N02BA01"},
+            {"drug": "PARACETAMOL", "atccode": "N02BE01"},
+        ],
+        "search_column": "drug",
+    }
+    publications = [
+        {
+            "rows": to_records(
+                [{"id": "NCT1", "scientific_title": "Aspirin trial", "date": "1 January 2020", "journal": "J1"}],
+                "clinical_trials",
+            ),
+            "table_name": "clinical_trials",
+            "search_column": "scientific_title",
+        },
+        {
+            "rows": to_records(
+                [
+                    {"id": "1", "title": "Study of aspirin", "date": "01/01/2019", "journal": "J2"},
+                    {"id": "2", "title": "Unrelated", "date": "01/01/2019", "journal": "J2"},
+                ],
+                "pubmed",
+            ),
+            "table_name": "pubmed",
+            "search_column": "title",
+        },
+    ]
+
+    result = find_drug_mentions(drugs, publications)
+    assert result == [
+        {
+            "drug": "N02BA01",
+            "clinical_trials": [
+                {"id": "NCT1", "date": "1 January 2020", "day": date(2020, 1, 1).toordinal()}
+            ],
+            "journal": [{"name": "J2", "date": "01/01/2019"}],
+            "pubmed": [{"id": "1", "date": "01/01/2019", "day": date(2019, 1, 1).toordinal()}],
+        }
+    ]
+
+
+def test_match_texts_parallel():
+    """Test parallel matching gives the same ordered results as serial matching"""
+    names = ["aspirin", "paracetamol"]
+    texts = ["aspirin", "none", "Paracetamol and aspirin", "paracetamol"] * 5
+    serial = list(match_texts(names, texts))
+    parallel = list(match_texts(names, texts, workers=2, chunk_size=3))
+    assert parallel == serial
+    assert serial[:3] == [(0, [0]), (2, [0, 1]), (3, [1])]
+
+
+def test_normalize_text():
+    """Test titles are decoded, casefolded, de-accented and tokenized"""
+    assert normalize_text("Hôpitaux de GENÈVE") == " hopitaux de geneve "
+    assert normalize_text(r"Laminoplasty or \xc3\xb1 Laminectomy") == " laminoplasty or n laminectomy "
+    assert normalize_text("Straße, ﬁrst-line") == " strasse first line "
+
+
+def test_find_drug_mentions_word_mode():
+    """Test word mode matches names on token boundaries of the normalized titles"""
+    drugs = {
+        "rows": [
+            {"drug": "ETHANOL", "atccode": "V03AB"},
+            {"drug": "Vitamin C", "atccode": "A11GA"},
+            {"drug": "CAFÉINE", "atccode": "N06BC"},
+        ],
+        "search_column": "drug",
+    }
+    publication = {
+        "rows": [
+            {"id": "1", "title": "Methanol poisoning", "date": "01/01/2019", "journal": "J1"},
+            {"id": "2", "title": "Ethanol, then VITAMIN   c.", "date": "01/01/2019", "journal": "J1"},
+            {"id": "3", "title": "Caffeine or cafeine", "date": "01/01/2019", "journal": "J1"},
+        ],
+        "table_name": "pubmed",
+        "search_column": "title",
+    }
+
+    substring = find_drug_mentions(drugs, [publication])
+    assert [(m["drug"], [p["id"] for p in m["pubmed"]]) for m in substring] == [
+        ("V03AB", ["1", "2"]),
+    ]
+
+    word = find_drug_mentions(drugs, [publication], match_mode="word")
+    assert [(m["drug"], [p["id"] for p in m["pubmed"]]) for m in word] == [
+        ("V03AB", ["2"]),
+        ("A11GA", ["2"]),
+        ("N06BC", ["3"]),
+    ]
+    # The normalized titles are cached in the table and reused
+    assert publication["normalized_titles"][1] == " ethanol then vitamin c "
+    compiled = DrugDictionary(drugs["rows"], "drug").to_drugs()
+    assert find_drug_mentions(compiled, [publication], match_mode="word") == word
+
+    with pytest.raises(ValueError):
+        find_drug_mentions(drugs, [publication], match_mode="fuzzy")